@@ -0,0 +1,37 @@
+"""Benchmarks of the ntixl2 package.
+
+The benchmarks are run as modules from the repository root:
+
+- :mod:`benchmarks.serial_stack`: commands per second and latency percentiles of\
+  :meth:`ntixl2.xl2.XL2SLM.serial_message` for different message types against the emulated XL2 device\
+  (:mod:`ntixl2.emulator`)::
+
+    python -m benchmarks.serial_stack --count 2000 --latency 0.001
+
+- :mod:`benchmarks.log_parser`: rows per second and peak memory of :func:`ntixl2.xl2parser.parse_broadband_file` on\
+  synthetic broadband logs::
+
+    python -m benchmarks.log_parser --rows 1000 100000 10000000
+
+Both benchmarks accept `--json FILE` to save the results for comparison with a later run.
+
+"""
+
+import json
+import platform
+
+
+def percentile(values, q):
+    """Return the q-th percentile (0-100) of values, nearest rank method."""
+    s = sorted(values)
+    if not s:
+        return float('nan')
+    k = max(int(round(q / 100. * len(s) + 0.5)) - 1, 0)
+    return s[min(k, len(s) - 1)]
+
+
+def save_json(path, name, results):
+    """Save benchmark results with the platform description to a json file."""
+    with open(path, 'w') as f:
+        json.dump({'benchmark': name, 'platform': platform.platform(), 'python': platform.python_version(),
+                   'results': results}, f, indent=2)
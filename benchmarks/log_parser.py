@@ -0,0 +1,74 @@
+"""Benchmark of the log parser: rows/second and peak memory of the xl2parser functions.
+
+usage: python -m benchmarks.log_parser [--rows N [N ...]] [--parser NAME] [--repeat N] [--no-memory] [--json FILE]
+
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import tracemalloc
+from collections import deque
+from ntixl2.xl2parser import parse_broadband_file, iter_broadband_file
+from .synthetic import write_broadband_log
+from . import save_json
+
+PARSERS = {
+    'parse': parse_broadband_file,
+    'columnar': lambda path: parse_broadband_file(path, columnar=True),
+    # consume the chunks, keep none
+    'iter': lambda path: deque(iter_broadband_file(path), maxlen=0),
+}
+
+
+def run(path, rows, repeat, memory, parser='parse'):
+    """Parse the log file and return the benchmark result dict."""
+    parse = PARSERS[parser]
+    best = float('inf')
+    for i in range(repeat):
+        t = time.perf_counter()
+        parse(path)
+        best = min(best, time.perf_counter() - t)
+    kept = peak = None
+    if memory:
+        # separate run, tracemalloc slow down the parsing
+        tracemalloc.start()
+        result = parse(path)
+        kept, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del result
+    return {'parser': parser, 'rows': rows, 'file_mb': os.path.getsize(path) / 2 ** 20, 'seconds': best, 'rows_per_s': rows / best,
+            'peak_mb': None if peak is None else peak / 2 ** 20,
+            'result_mb': None if kept is None else kept / 2 ** 20}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000], help="rows of the logs")
+    parser.add_argument('--parser', choices=sorted(PARSERS), default='parse', help="parser function")
+    parser.add_argument('--repeat', type=int, default=3, help="parse repetitions, the best time is reported")
+    parser.add_argument('--no-memory', action='store_true', help="don't measure the peak memory")
+    parser.add_argument('--json', help="save results to json file")
+    args = parser.parse_args(argv)
+
+    results = []
+    print("{:>10}{:>10}{:>10}{:>12}{:>10}{:>12}".format('rows', 'file[MB]', 'time[s]', 'rows/s', 'peak[MB]',
+                                                        'result[MB]'))
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, 'bench_{}_123_Log.txt'.format(rows))
+            write_broadband_log(path, rows)
+            r = run(path, rows, args.repeat, not args.no_memory, args.parser)
+            results.append(r)
+            print("{rows:>10}{file_mb:>10.1f}{seconds:>10.3f}{rows_per_s:>12.0f}".format(**r) +
+                  ("{:>10}{:>12}".format('-', '-') if r['peak_mb'] is None else
+                   "{:>10.1f}{:>12.1f}".format(r['peak_mb'], r['result_mb'])))
+            os.remove(path)
+    if args.json:
+        save_json(args.json, 'log_parser', results)
+    return results
+
+
+if __name__ == '__main__':
+    main()
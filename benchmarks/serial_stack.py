@@ -0,0 +1,79 @@
+"""Benchmark of the serial stack: commands/second and p50/p99 latency of XL2SLM.serial_message.
+
+usage: python -m benchmarks.serial_stack [--count N] [--latency SEC] [--jitter SEC] [--no-session] [--json FILE]
+
+"""
+
+import time
+import argparse
+from ntixl2.xl2 import XL2SLM
+from ntixl2.emulator import XL2Emulator
+from ntixl2.message import ECHO, QUERY_IDN, QUERY_INITIATE_STATE, QUERY_SYSTEM_ERROR, QUERY_MEAS_SLM_123, \
+    INITIATE, MEASURE_INITIATE, CommandBatch, STATISTICS
+from . import percentile, save_json
+
+
+def slm_query(params):
+    m = QUERY_MEAS_SLM_123()
+    for p in params:
+        m.append_param(p)
+    return m
+
+
+def messages():
+    """Return list of (name, message factory) to benchmark."""
+    return [
+        ('ECHO', ECHO),
+        ('QUERY_IDN', QUERY_IDN),
+        ('QUERY_INITIATE_STATE', QUERY_INITIATE_STATE),
+        ('QUERY_SYSTEM_ERROR', QUERY_SYSTEM_ERROR),
+        ('INITIATE.START', INITIATE.START),
+        ('MEASURE_INITIATE', MEASURE_INITIATE),
+        ('QUERY_MEAS_SLM_123 x1', lambda: slm_query(['LAEQ'])),
+        ('QUERY_MEAS_SLM_123 x2', lambda: slm_query([s[0] for s in STATISTICS[:2]])),
+        ('batch INIT+SLM+STATE', lambda: CommandBatch([MEASURE_INITIATE(), slm_query(['LAEQ']),
+                                                       QUERY_INITIATE_STATE()])),
+    ]
+
+
+def run(xl2, name, factory, count):
+    """Send count messages and return the benchmark result dict."""
+    latencies = []
+    message = factory()
+    t0 = time.perf_counter()
+    for i in range(count):
+        t = time.perf_counter()
+        xl2.serial_message(message)
+        latencies.append(time.perf_counter() - t)
+    total = time.perf_counter() - t0
+    return {'message': name, 'count': count, 'commands_per_s': count / total,
+            'p50_ms': 1e3 * percentile(latencies, 50), 'p99_ms': 1e3 * percentile(latencies, 99)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=500, help="messages per message type")
+    parser.add_argument('--latency', type=float, default=0., help="emulated device answer latency in seconds")
+    parser.add_argument('--jitter', type=float, default=0., help="emulated device answer jitter in seconds")
+    parser.add_argument('--no-session', action='store_true', help="open and close the port for every message")
+    parser.add_argument('--json', help="save results to json file")
+    args = parser.parse_args(argv)
+
+    results = []
+    with XL2Emulator(latency=args.latency, jitter=args.jitter, seed=0) as emu:
+        xl2 = XL2SLM(mountDir='/tmp', serialDev=emu.serialDev, storageDev=None)
+        if not args.no_session:
+            xl2.open()
+        print("{:<24}{:>10}{:>12}{:>10}{:>10}".format('message', 'count', 'cmd/s', 'p50[ms]', 'p99[ms]'))
+        for name, factory in messages():
+            r = run(xl2, name, factory, args.count)
+            results.append(r)
+            print("{message:<24}{count:>10}{commands_per_s:>12.1f}{p50_ms:>10.3f}{p99_ms:>10.3f}".format(**r))
+        xl2.close()
+    if args.json:
+        save_json(args.json, 'serial_stack', results)
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Synthetic XL2 log files in the format written by the XL2 device."""
+
+import random
+import datetime
+
+BROADBAND_HEADER = """XL2 Broadband Logging:\t\tBENCH\\{name}
+----------------------
+
+
+# Hardware Configuration
+\tDevice Info:    \tXL2, SNo. A2A-00000-E0, FW4.21
+\tMic Type:       \tNTi Audio M2230, SNo. 0000, User calibrated 2016-06-22  08:12
+\tMic Sensitivity:\t38.2 mV/Pa
+
+# Measurement Setup
+\tProfile:        \tBENCH
+\tTimer mode:     \tcontinuous
+\tTimer set:      \t00:00:00
+\tLog-Interval:   \t00:00:01
+\tk1:             \t0.0 dB
+\tk2:             \t0.0 dB
+\tkset Date:      \tk-Values not measured
+\tRange:          \t20 - 120 dB
+
+# Time
+\tStart:          \t{start:%Y-%m-%d, %H:%M:%S}
+\tEnd:            \t{end:%Y-%m-%d, %H:%M:%S}
+
+# Broadband LOG Results
+\tDate        \tTime      \tTimer     \tLZeq_dt \tLZeq    \tLZFmax_dt\tLZFmin_dt\tLAeq_dt \tLAeq    \tPause   
+\t[YYYY-MM-DD]\t[hh:mm:ss]\t[hh:mm:ss]\t[dB]    \t[dB]    \t[dB]     \t[dB]     \t[dB]    \t[dB]    \t        
+"""
+
+BROADBAND_FOOTER = """
+# Broadband LOG Results over whole log period
+\tnot available in repeat timer modes
+"""
+
+
+def write_broadband_log(path, rows, start=datetime.datetime(2016, 6, 28, 20, 5, 8), seed=0):
+    """Write a synthetic broadband log file with `rows` rows logged every second.
+
+    Parameters
+    ----------
+    path : str
+        file path
+    rows : int
+        number of logged rows
+    start : datetime.datetime
+        measurement start
+    seed : int
+        seed of the random generator
+
+    """
+    rnd = random.Random(seed)
+    # a pool of pre formatted level cells keep the generation fast for 10M rows
+    cells = ["{:<8.1f}".format(rnd.gauss(55, 5)) for i in range(997)]
+    second = datetime.timedelta(seconds=1)
+    end = start + rows * second
+    name = path.rsplit('/', 1)[-1]
+    with open(path, 'w') as f:
+        f.write(BROADBAND_HEADER.format(name=name, start=start, end=end))
+        t = start
+        for i in range(rows):
+            t += second
+            c = [cells[(i * 7 + j) % 997] for j in range(6)]
+            f.write("\t{:%Y-%m-%d}  \t{:%H:%M:%S}  \t{:02d}:{:02d}:{:02d}  \t{}\t{}\t{} \t{} \t{}\t{}\t        \n".format(
+                t, t, (i // 3600) % 100, (i // 60) % 60, i % 60, *c))
+        f.write(BROADBAND_FOOTER)
@@ -3,6 +3,7 @@
 import sys
 from ntixl2.xl2 import XL2SLM
 from ntixl2.message import *
+from ntixl2.sampler import sample
 
 import time
 import datetime
@@ -33,19 +34,14 @@ slmq = QUERY_MEAS_SLM_123()
 slmq.set_param('LAEQ')
 
 # #initiate state
-xl2.serial_message(INITIATE.START())
-# do measurement of sec length
-i = 0
-while i <= repetition:
-    state = xl2.serial_message(QUERY_INITIATE_STATE())[ 'state' ]
-    if state == 'RUNNING':
-        xl2.serial_message(MEASURE_INITIATE())
-        r = xl2.serial_message(slmq)
-        print("elapsed time: {}; value: {}".format(str(datetime.timedelta(seconds=i*timestep)), r))
-        time.sleep(timestep)
-        i += 1
-    else:
+with xl2:
+    xl2.serial_message(INITIATE.START())
+    while xl2.serial_message(QUERY_INITIATE_STATE())['state'] != 'RUNNING':
         time.sleep(0.1)
-#
-xl2.serial_message(INITIATE.STOP())
+    # do measurement of sec length
+    for i, s in enumerate(sample(xl2, slmq, timestep, count=repetition + 1)):
+        print("elapsed time: {}; value: {}; missed: {}".format(str(datetime.timedelta(seconds=i*timestep)), s.values,
+                                                               s.missed))
+    #
+    xl2.serial_message(INITIATE.STOP())
 print('STOP measurement')
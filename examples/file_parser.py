@@ -1,9 +1,11 @@
 from ntixl2.xl2parser import *
 
-Edict = parse_broadband_file("data/2016-06-28_SLM_002_123_Log.txt")
+broadband = parse_broadband_file("data/2016-06-28_SLM_002_123_Log.txt")
 
-print(dict)
+print(broadband)
 
-dict = parse_spectrum_file("data/2016-06-28_SLM_002_RTA_3rd_Log.txt")
+spectrum = parse_spectrum_file("data/2016-06-28_SLM_002_RTA_3rd_Log.txt")
 
-print(dict)
\ No newline at end of file
+rta = spectrum['RTA LOG Results LZeq_dt']
+print(rta['bands'])
+print(rta['timestamps'][0], rta['levels'][0])
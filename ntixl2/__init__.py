@@ -6,4 +6,13 @@ import ntixl2.message
 import ntixl2.xl2
 from ntixl2.xl2 import XL2SLM
 import ntixl2.xl2parser
+import ntixl2.aioxl2
+from ntixl2.aioxl2 import AsyncXL2SLM
+import ntixl2.fleet
+from ntixl2.fleet import XL2Fleet
+import ntixl2.sampler
+import ntixl2.ringbuffer
+import ntixl2.columnar
+import ntixl2.stats
 
+import ntixl2.parsecache
@@ -0,0 +1,250 @@
+"""The aioxl2.py module implement the XL2 device for asyncio applications.
+
+The :class:`ntixl2.aioxl2.AsyncXL2SLM` object has the same interface as :class:`ntixl2.xl2.XL2SLM` but the serial \
+communication methods are coroutines. The serial answers are read by a non-blocking reader registered on the serial \
+file descriptor, so many devices can be driven from a single event loop without a thread per device.
+
+Note
+----
+- The requirements of the :mod:`ntixl2.xl2` module apply.
+
+- The file system methods (:meth:`memory_usage`, :meth:`list_files`, ...) are inherited and blocking.
+
+Example
+-------
+>>> async def main():
+...     async with AsyncXL2SLM(mountDir) as xl2:
+...         print(await xl2.identification())
+>>> asyncio.get_event_loop().run_until_complete(main())
+
+"""
+
+import time
+import asyncio
+import warnings
+import serial
+from .xl2 import XL2SLM, XL2Error, _ACK, _ACK_ANSWER
+from .message import RESET, SYSTEM_KEY, QUERY_SYSTEM_ERROR, QUERY_IDN, SYSTEM_KLOCK
+
+
+class AsyncXL2SLM(XL2SLM):
+    """The XL2 device object for asyncio applications.
+
+    See :class:`ntixl2.xl2.XL2SLM`.
+
+    """
+
+    def __init__(self, mountDir, serialDev='/dev/XL2', storageDev='/dev/XL2-sd', ack='echo'):
+        """Initiate
+
+        Parameters
+        ----------
+        serialDev : str
+            XL2 device file when in serial modus
+        storageDev : str
+            XL2 device file when in mass storage modus
+        mountDir : str
+            XL2 mount directory
+        ack : str
+            acknowledgement mode of messages without answers {'echo'|'wait'}
+
+        """
+        self._reader = None
+        self._loop = None
+        self._lock = None
+        super(AsyncXL2SLM, self).__init__(mountDir, serialDev, storageDev, ack)
+
+    async def __aenter__(self):
+        return self.open()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """ Close the serial session and the serial connection."""
+        self._detach()
+        super(AsyncXL2SLM, self).close()
+
+    def _connect(self):
+        # (re)open the serial connection in non-blocking mode
+        self._detach()
+        super(AsyncXL2SLM, self)._connect()
+        self.conn.timeout = 0
+
+    def _attach(self):
+        # register non-blocking reader on the serial file descriptor
+        if self._reader is None:
+            self._loop = asyncio.get_event_loop()
+            self._reader = asyncio.StreamReader()
+            self._loop.add_reader(self.conn.fileno(), self._on_readable)
+        return self._reader
+
+    def _detach(self):
+        # unregister reader
+        if self._reader is not None:
+            if self.conn is not None and self.conn.is_open:
+                self._loop.remove_reader(self.conn.fileno())
+            self._reader, self._loop = None, None
+
+    def _on_readable(self):
+        try:
+            data = self.conn.read(self.conn.in_waiting or 1)
+        except serial.SerialException as e:
+            self._loop.remove_reader(self.conn.fileno())
+            self._reader.set_exception(e)
+        else:
+            self._reader.feed_data(data)
+
+    async def _readline(self, timeout):
+        # return "" if timeout
+        try:
+            line = await asyncio.wait_for(self._reader.readline(), timeout)
+        except asyncio.TimeoutError:
+            return ""
+        return line.decode('ascii')
+
+    async def serial_message(self, message, wait=5, ack=None):
+        """ Coroutine, see :meth:`ntixl2.xl2.XL2SLM.serial_message`.
+
+        Concurrent calls on the same device are serialized.
+
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            return await self._serial_message(message, wait, self.ack if ack is None else ack)
+
+    async def _serial_message(self, message, wait, ack):
+        if self.device_status == 'SERIAL':
+            try:
+                try:
+                    ret = await self._exchange(message, wait, ack)
+                except serial.SerialException:
+                    if not self._session:
+                        raise
+                    # reconnect and retry once
+                    self._connect()
+                    ret = await self._exchange(message, wait, ack)
+            finally:
+                if not self._session:
+                    self._detach()
+                    self.conn.close()
+            return ret
+        else:
+            raise XL2Error('device_status has to be SERIAL')
+
+    def _drain(self):
+        # drop late answers of previous messages, else the answers are shifted
+        self.conn.reset_input_buffer()
+        self._reader = asyncio.StreamReader()
+
+    async def _exchange(self, message, wait, ack):
+        self._attach()
+        self._drain()
+        t0 = time.perf_counter()
+        ttfb, bytes_in, timeout, parse_failure = None, 0, False, False
+        sentinel = message.RETURN is None and ack == 'echo'
+        # write message
+        out = message.to_bytes() + (_ACK.to_bytes() if sentinel else b"")
+        self.conn.write(out)
+        t_write = time.perf_counter() - t0
+        try:
+            # read return lines
+            if message.RETURN is not None or sentinel:
+                ret = []
+                for i in range(message.return_lines() if not sentinel else 1):
+                    line = await self._readline(wait)
+                    if i == 0:
+                        # time to the first line, the reader doesn't expose the first byte
+                        ttfb = time.perf_counter() - t0
+                    bytes_in += len(line)
+                    timeout = line == ""
+                    assert not line == ""
+                    ret.append(line)
+                if sentinel:
+                    if not ret[0] == _ACK_ANSWER:
+                        # read the sentinel answer too, keep the line in sync
+                        bytes_in += len(await self._readline(wait))
+                        raise ValueError('message expect no return,answer is {}.'.format(ret[0]))
+                    ret = None
+                else:
+                    try:
+                        ret = message.parse_answers(ret)
+                    except Exception:
+                        parse_failure = True
+                        raise
+            else:
+                # if message has no return raise error if there is a return
+                line = await self._readline(0.1)
+                bytes_in += len(line)
+                if not line == "":
+                    raise ValueError('message expect no return,answer is {}.'.format(line))
+                ret = None
+        finally:
+            self._record(message, t_write, ttfb, time.perf_counter() - t0, len(out), bytes_in, timeout,
+                         parse_failure, t0)
+        return ret
+
+    async def to_mass(self):
+        """ Coroutine, see :meth:`ntixl2.xl2.XL2SLM.to_mass`.
+
+        The switch is run in a thread, see :meth:`switch_to_mass`.
+
+        """
+        if not await self.switch_to_mass():
+            warnings.warn("timeout", UserWarning)
+
+    async def to_serial(self):
+        """ Coroutine, see :meth:`ntixl2.xl2.XL2SLM.to_serial`.
+
+        The switch is run in a thread, see :meth:`switch_to_serial`.
+
+        """
+        if not await self.switch_to_serial():
+            warnings.warn("timeout", UserWarning)
+
+    def switch_to_mass(self):
+        """ See :meth:`ntixl2.xl2.XL2SLM.switch_to_mass`. Call it from the event loop thread."""
+        # unregister reader in the event loop thread, the session ends with the switch
+        self.close()
+        return super(AsyncXL2SLM, self).switch_to_mass()
+
+    async def snapshot(self, out=None, row=0, wait=5):
+        """ Coroutine, see :meth:`ntixl2.xl2.XL2SLM.snapshot`."""
+        batch = self._snapshot_batch(out, row)
+        t = time.time()
+        rec = await self.serial_message(batch, wait)
+        rec['time'] = t
+        return rec
+
+    async def select_profile(self, profile=5):
+        """ Coroutine, see :meth:`ntixl2.xl2.XL2SLM.select_profile`."""
+        # reset
+        await self.serial_message(RESET())
+        # key msg
+        m = SYSTEM_KEY()
+        # select profile
+        for par in ['ESC', 'ENTER'] + ['NEXT'] * 8 + ['ENTER'] * 2 + ['NEXT'] * profile + ['ENTER']:
+            m.append_param(par)
+        r = await self.serial_message(m)
+        assert r['status'] == 'ok'
+        await asyncio.sleep(5)
+
+    async def klock(self, locked=False):
+        """ Coroutine, see :meth:`ntixl2.xl2.XL2SLM.klock`."""
+        if locked:
+            await self.serial_message(SYSTEM_KLOCK.ON())
+        else:
+            await self.serial_message(SYSTEM_KLOCK.OFF())
+
+    async def check_errors(self):
+        """ Coroutine, see :meth:`ntixl2.xl2.XL2SLM.check_errors`."""
+        return await self.serial_message(QUERY_SYSTEM_ERROR())
+
+    async def reset(self):
+        """ Coroutine, see :meth:`ntixl2.xl2.XL2SLM.reset`."""
+        await self.serial_message(RESET())
+
+    async def identification(self):
+        """ Coroutine, see :meth:`ntixl2.xl2.XL2SLM.identification`."""
+        return await self.serial_message(QUERY_IDN())
@@ -0,0 +1,371 @@
+"""The columnar.py module implement an append-only columnar file format for XL2 measurement records.
+
+A :class:`ColumnWriter` persists records of a NumPy structured dtype (by default \
+:attr:`ntixl2.message.SLMSnapshot.DTYPE`) in chunks. Every chunk stores its rows column by column, so a \
+:class:`ColumnReader` memory-maps the file and returns the columns without parsing nor copy. The file can be read \
+while it is still written: the reader only sees the chunks already written and :meth:`ColumnReader.refresh` picks up \
+the new ones.
+
+File layout (little endian)::
+
+    header   b'XL2COL1\\0', uint32 header length, JSON header {"dtype": ..., "chunk_rows": ...}, padding
+             (dtype as NumPy array interface descr, subarray fields keep their shape)
+    chunk    b'CHNK', uint32 rows, float64 first time, float64 last time, 8 bytes padding, the columns
+    ...
+    footer   chunks index (uint64 offset, uint64 rows, float64 first time, float64 last time) per chunk,
+             uint64 index offset, b'XL2CIDX\\0'
+
+The footer is written by :meth:`ColumnWriter.close`. Without footer (writer still running or killed) the reader scans \
+the chunk headers. A writer opened on an existing file truncates the footer and any incomplete chunk and appends.
+
+Example
+-------
+>>> with ColumnWriter('levels.xl2c') as sink, xl2:
+...     for s in sample_snapshots(xl2, period=1, buffer=sink):
+...         pass
+>>> with ColumnReader('levels.xl2c') as src:
+...     day = src.read(start=t0, end=t0 + 86400, fields=['time', 'LAEQ'])
+
+"""
+
+import os
+import json
+import time
+import mmap
+import struct
+import numpy as np
+from .message import SLMSnapshot
+
+MAGIC = b'XL2COL1\0'
+INDEX_MAGIC = b'XL2CIDX\0'
+_CHUNK_MAGIC = b'CHNK'
+_CHUNK_HEAD = struct.Struct('<4sIdd8x')
+_INDEX_ENTRY = np.dtype([('offset', '<u8'), ('rows', '<u8'), ('first', '<f8'), ('last', '<f8')])
+_TRAILER = struct.Struct('<Q8s')
+
+
+def _pad(n):
+    # padding to the next multiple of 8 bytes
+    return -n % 8
+
+
+def _little_endian(dtype):
+    # the record dtype with little endian fields, subarray fields keep their shape
+    return np.dtype([(name, dtype.fields[name][0].base.newbyteorder('<'), dtype.fields[name][0].shape)
+                     for name in dtype.names])
+
+
+def _dtype_to_json(dtype):
+    return np.lib.format.dtype_to_descr(_little_endian(dtype))
+
+
+class ColumnWriter(object):
+    """Append-only writer of records in chunked columnar format.
+
+    Attributes
+    ----------
+    path : str
+        file path
+    dtype : :class:`numpy.dtype`
+        record dtype, a structured dtype whose optional `time` field gives the chunks time range
+    chunk_rows : int
+        max number of rows per chunk
+    flush_interval : float
+        max seconds between two writes to the disk. The rows appended since the last chunk are then written as a\
+        smaller chunk and the file is synced. `None` to write full chunks only.
+    rows : int
+        number of rows in the file, including the buffered ones
+
+    """
+
+    def __init__(self, path, dtype=SLMSnapshot.DTYPE, chunk_rows=4096, flush_interval=60.):
+        """Initiate
+
+        Parameters
+        ----------
+        path : str
+            file path. An existing file is appended, its dtype has to match.
+        dtype : :class:`numpy.dtype`
+            record dtype
+        chunk_rows : int
+            max number of rows per chunk
+        flush_interval : float
+            max seconds between two writes to the disk, `None` to write full chunks only
+
+        """
+        self.path = str(path)
+        self.dtype = np.dtype(dtype)
+        self.chunk_rows = int(chunk_rows)
+        self.flush_interval = flush_interval
+        self._index = []
+        self._buffer = np.zeros(self.chunk_rows, self.dtype)
+        self._n = 0
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            with ColumnReader(self.path) as reader:
+                if reader.dtype != _little_endian(self.dtype):
+                    raise ValueError('{} has dtype {}'.format(self.path, reader.dtype))
+                self._index = [tuple(c) for c in reader.chunks]
+                end = reader.data_end
+            self._file = open(self.path, 'r+b')
+            # drop the footer and any incomplete chunk
+            self._file.truncate(end)
+            self._file.seek(end)
+        else:
+            self._file = open(self.path, 'wb')
+            self._write_header()
+        self.rows = sum(int(c[1]) for c in self._index)
+        self._last_flush = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _write_header(self):
+        header = json.dumps({'dtype': _dtype_to_json(self.dtype), 'chunk_rows': self.chunk_rows}).encode('ascii')
+        header += b' ' * _pad(len(MAGIC) + 4 + len(header))
+        self._file.write(MAGIC + struct.pack('<I', len(header)) + header)
+
+    def append(self, record):
+        """Append a record.
+
+        Parameters
+        ----------
+        record : :class:`numpy.void` or tuple
+            record of :attr:`dtype`
+        """
+        self._buffer[self._n] = record
+        self._n += 1
+        self.rows += 1
+        if self._n == self.chunk_rows:
+            self.flush()
+        elif self.flush_interval is not None and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def extend(self, records):
+        """Append an array of records.
+
+        Parameters
+        ----------
+        records : :class:`numpy.ndarray`
+            records of :attr:`dtype`
+        """
+        records = np.asarray(records, self.dtype)
+        i = 0
+        while i < len(records):
+            n = min(self.chunk_rows - self._n, len(records) - i)
+            self._buffer[self._n:self._n + n] = records[i:i + n]
+            self._n += n
+            self.rows += n
+            i += n
+            if self._n == self.chunk_rows:
+                self._write_chunk()
+        self._sync()
+
+    def flush(self):
+        """Write the buffered rows as a chunk and sync the file."""
+        self._write_chunk()
+        self._sync()
+
+    def _write_chunk(self):
+        if not self._n:
+            return
+        rows = self._buffer[:self._n]
+        if 'time' in self.dtype.names:
+            first, last = float(rows['time'][0]), float(rows['time'][-1])
+        else:
+            first = last = float('nan')
+        offset = self._file.tell()
+        parts = [_CHUNK_HEAD.pack(_CHUNK_MAGIC, self._n, first, last)]
+        for name in self.dtype.names:
+            col = np.ascontiguousarray(rows[name], dtype=self.dtype.fields[name][0].base.newbyteorder('<'))
+            parts.append(col.tobytes())
+            parts.append(b'\0' * _pad(col.nbytes))
+        self._file.write(b''.join(parts))
+        self._index.append((offset, self._n, first, last))
+        self._n = 0
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        """Write the buffered rows and the footer, close the file."""
+        if self._file is None:
+            return
+        self._write_chunk()
+        offset = self._file.tell()
+        self._file.write(np.array(self._index, _INDEX_ENTRY).tobytes() + _TRAILER.pack(offset, INDEX_MAGIC))
+        self._sync()
+        self._file.close()
+        self._file = None
+
+
+class ColumnReader(object):
+    """Memory-mapped reader of files written by :class:`ColumnWriter`.
+
+    Attributes
+    ----------
+    path : str
+        file path
+    dtype : :class:`numpy.dtype`
+        record dtype
+    chunks : :class:`numpy.ndarray`
+        chunks index with fields `offset`, `rows`, `first` and `last` (first and last time of the chunk)
+    complete : bool
+        True if the file has a footer, i.e. the writer was closed
+    data_end : int
+        file offset after the last complete chunk
+
+    """
+
+    def __init__(self, path):
+        """Initiate
+
+        Parameters
+        ----------
+        path : str
+            file path
+
+        """
+        self.path = str(path)
+        self._file = open(self.path, 'rb')
+        self._map = None
+        self.chunks = np.zeros(0, _INDEX_ENTRY)
+        self.complete = False
+        self.refresh()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return int(self.chunks['rows'].sum())
+
+    def close(self):
+        """Close the file. The arrays returned by :meth:`chunk` are invalid afterwards."""
+        self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def refresh(self):
+        """Map the file again and index the chunks written since the last call.
+
+        Returns
+        -------
+        int
+            number of new rows
+        """
+        size = os.fstat(self._file.fileno()).st_size
+        before = len(self)
+        if size == 0:
+            raise ValueError('{} is empty'.format(self.path))
+        self._map = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError('{} is not a columnar XL2 file'.format(self.path))
+        if not hasattr(self, 'dtype'):
+            n = struct.unpack_from('<I', self._map, len(MAGIC))[0]
+            header = json.loads(self._map[len(MAGIC) + 4:len(MAGIC) + 4 + n].decode('ascii'))
+            self.dtype = np.lib.format.descr_to_dtype(header['dtype'])
+            self.chunk_rows = header['chunk_rows']
+            self._header_end = len(MAGIC) + 4 + n
+        if size >= self._header_end + _TRAILER.size and self._map[size - 8:] == INDEX_MAGIC:
+            offset = _TRAILER.unpack_from(self._map, size - _TRAILER.size)[0]
+            count = (size - _TRAILER.size - offset) // _INDEX_ENTRY.itemsize
+            self.chunks = np.frombuffer(self._map, _INDEX_ENTRY, count, offset).copy()
+            self.complete = True
+            self.data_end = offset
+        else:
+            self._scan(size)
+        return len(self) - before
+
+    def _chunk_size(self, rows):
+        return _CHUNK_HEAD.size + sum(rows * dt.itemsize + _pad(rows * dt.itemsize)
+                                      for dt in (self.dtype.fields[n][0] for n in self.dtype.names))
+
+    def _scan(self, size):
+        # read the chunk headers following the indexed chunks
+        chunks = [tuple(c) for c in self.chunks]
+        offset = self._header_end if not chunks else int(chunks[-1][0]) + self._chunk_size(int(chunks[-1][1]))
+        while offset + _CHUNK_HEAD.size <= size:
+            magic, rows, first, last = _CHUNK_HEAD.unpack_from(self._map, offset)
+            end = offset + self._chunk_size(rows)
+            if magic != _CHUNK_MAGIC or end > size:
+                break
+            chunks.append((offset, rows, first, last))
+            offset = end
+        self.chunks = np.array(chunks, _INDEX_ENTRY)
+        self.complete = False
+        self.data_end = offset
+
+    def chunk(self, i, fields=None):
+        """Return the columns of a chunk without copy.
+
+        Parameters
+        ----------
+        i : int
+            chunk index
+        fields : list
+            field names, all fields if `None`
+
+        Returns
+        -------
+        dict
+            dict of read-only arrays mapped on the file, keyed by field name
+        """
+        offset, rows = int(self.chunks['offset'][i]), int(self.chunks['rows'][i])
+        offset += _CHUNK_HEAD.size
+        ret = {}
+        for name in self.dtype.names:
+            dt = self.dtype.fields[name][0]
+            if fields is None or name in fields:
+                ret[name] = np.frombuffer(self._map, dt, rows, offset)
+            offset += rows * dt.itemsize + _pad(rows * dt.itemsize)
+        return ret
+
+    def read(self, start=None, end=None, fields=None):
+        """Return the records of a time range.
+
+        Only the chunks overlapping the range are read.
+
+        Parameters
+        ----------
+        start : float
+            first time (included), `None` for no limit
+        end : float
+            last time (excluded), `None` for no limit
+        fields : list
+            field names, all fields if `None`
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            records, a structured array with the selected fields
+        """
+        names = [n for n in self.dtype.names if fields is None or n in fields]
+        dtype = np.dtype([(n, self.dtype.fields[n][0]) for n in names])
+        ranged = (start is not None or end is not None) and 'time' in self.dtype.names
+        keep = np.ones(len(self.chunks), bool)
+        if ranged:
+            if start is not None:
+                keep &= self.chunks['last'] >= start
+            if end is not None:
+                keep &= self.chunks['first'] < end
+        parts = []
+        for i in np.flatnonzero(keep):
+            cols = self.chunk(i, set(names) | ({'time'} if ranged else set()))
+            lo, hi = 0, int(self.chunks['rows'][i])
+            if ranged:
+                t = cols['time']
+                lo = np.searchsorted(t, start, 'left') if start is not None else lo
+                hi = np.searchsorted(t, end, 'left') if end is not None else hi
+            part = np.empty(hi - lo, dtype)
+            for n in names:
+                part[n] = cols[n][lo:hi]
+            parts.append(part)
+        return np.concatenate(parts) if parts else np.zeros(0, dtype)
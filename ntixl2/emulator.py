@@ -0,0 +1,291 @@
+"""The emulator.py module implement a pseudo-terminal emulator of the XL2 device in serial modus.
+
+The emulator answers the serial messages defined in :mod:`ntixl2.message` on the slave side of a pseudo-terminal, \
+so :class:`ntixl2.xl2.XL2SLM` works against it unchanged. The answers latency, its jitter and the error rates are \
+configurable, which make the emulator suitable for benchmarks and regression tests of the serial stack on hosts \
+without XL2 device.
+
+Note
+----
+- **The implementation is for linux systems only**
+
+- The emulator can be started from the command line, the device file is printed::
+
+    python -m ntixl2.emulator --latency 0.01
+
+Example
+-------
+>>> with XL2Emulator(latency=0.005, jitter=0.002) as emu:
+...     xl2 = XL2SLM(mountDir='/tmp', serialDev=emu.serialDev)
+...     xl2.identification()
+
+"""
+
+import os
+import pty
+import tty
+import time
+import random
+import select
+import threading
+from .message import ECHO, QUERY_IDN, RESET, INITIATE, QUERY_INITIATE_STATE, MEASURE_FUNCTION, \
+    QUERY_MEASURE_FUNCTION, MEASURE_INITIATE, QUERY_MEASURE_TIMER, QUERY_MEASURE_DTTIME, QUERY_MEAS_SLM_123, \
+    QUERY_MEAS_RTA, QUERY_CALIBRATE_MIC_TYPE, QUERY_CALIBRATE_MIC_SENS_SOURCE, QUERY_CALIBRATE_MIC_SENS_VALUE, \
+    QUERY_SYSTEM_ERROR, SYSTEM_KEY, SYSTEM_KLOCK, QUERY_SYSTEM_KLOCK, QUERY_SYSTEM_OPTIONS, SYSTEM_MSDMAC
+
+
+def _keyword(message):
+    # command keyword of a message class
+    return message.ROOT.split()[0].upper()
+
+
+class XL2Emulator(object):
+    """Pseudo-terminal XL2 device emulator.
+
+    Attributes
+    ----------
+    serialDev : str
+        device file of the emulated XL2, `None` if the emulator is not running
+    latency : float or dict
+        answer latency in seconds. If dict, the latency per command keyword (eg. `'MEAS:SLM:123?'`) and the\
+        default latency with key `None`.
+    jitter : float
+        max random delay in seconds added to the latency
+    drop_rate : float
+        probability that the answer of a query is not sent
+    error_rate : float
+        probability that the answer of a query is a malformed line
+    commands : int
+        number of commands received
+
+    """
+
+    IDN = "NTi Audio,XL2,A2A-00000-E0,V4.21"
+    RTA_BANDS = 36
+    OPTIONS = "Extended Acoustic Pack"
+
+    def __init__(self, latency=0., jitter=0., drop_rate=0., error_rate=0., seed=None):
+        """Initiate
+
+        Parameters
+        ----------
+        latency : float or dict
+            answer latency in seconds
+        jitter : float
+            max random delay in seconds added to the latency
+        drop_rate : float
+            probability that the answer of a query is not sent
+        error_rate : float
+            probability that the answer of a query is a malformed line
+        seed : int
+            seed of the random generator
+
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.error_rate = error_rate
+        self.serialDev = None
+        self.commands = 0
+        self._random = random.Random(seed)
+        self._thread = None
+        self._handlers = {
+            _keyword(ECHO): self._echo,
+            _keyword(QUERY_IDN): lambda params: [self.IDN],
+            _keyword(RESET): self._reset,
+            _keyword(INITIATE): self._initiate,
+            _keyword(QUERY_INITIATE_STATE): lambda params: [self.state],
+            _keyword(MEASURE_FUNCTION): self._function,
+            _keyword(QUERY_MEASURE_FUNCTION): lambda params: [self.function],
+            _keyword(MEASURE_INITIATE): self._measure_initiate,
+            _keyword(QUERY_MEASURE_TIMER): lambda params: ["{:.1f} sec, OK".format(self._timer())],
+            _keyword(QUERY_MEASURE_DTTIME): lambda params: ["{:.1f} sec, OK".format(self._dt())],
+            _keyword(QUERY_MEAS_SLM_123): self._slm_123,
+            _keyword(QUERY_MEAS_RTA): self._rta,
+            _keyword(QUERY_CALIBRATE_MIC_TYPE): lambda params: ["M2230"],
+            _keyword(QUERY_CALIBRATE_MIC_SENS_SOURCE): lambda params: ["USER CALIBRATED"],
+            _keyword(QUERY_CALIBRATE_MIC_SENS_VALUE): lambda params: ["38.2e-3 V,OK"],
+            _keyword(QUERY_SYSTEM_ERROR): self._errors,
+            _keyword(SYSTEM_KEY): self._key,
+            _keyword(SYSTEM_KLOCK): self._klock,
+            _keyword(QUERY_SYSTEM_KLOCK): lambda params: [self.klock],
+            _keyword(QUERY_SYSTEM_OPTIONS): lambda params: [self.OPTIONS],
+            _keyword(SYSTEM_MSDMAC): lambda params: [],
+        }
+        self._reset([])
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        """Open the pseudo-terminal and start answering in a background thread.
+
+        Returns
+        -------
+        str
+            device file of the emulated XL2
+        """
+        if self._thread is None:
+            self._master, self._slave = pty.openpty()
+            # no echo, no line ending translation
+            tty.setraw(self._slave)
+            self._stop_r, self._stop_w = os.pipe()
+            self.serialDev = os.ttyname(self._slave)
+            self._thread = threading.Thread(target=self._serve, name="XL2Emulator", daemon=True)
+            self._thread.start()
+        return self.serialDev
+
+    def stop(self):
+        """Stop the emulator and close the pseudo-terminal."""
+        if self._thread is not None:
+            os.write(self._stop_w, b'x')
+            self._thread.join()
+            for fd in (self._master, self._slave, self._stop_r, self._stop_w):
+                os.close(fd)
+            self._thread, self.serialDev = None, None
+
+    def _serve(self):
+        buf = b''
+        while True:
+            r, _, _ = select.select([self._master, self._stop_r], [], [])
+            if self._stop_r in r:
+                return
+            try:
+                buf += os.read(self._master, 4096)
+            except OSError:
+                return
+            while b'\n' in buf:
+                line, buf = buf.split(b'\n', 1)
+                answers = self.answer(line.decode('ascii').strip())
+                if answers:
+                    self._delay(line)
+                    os.write(self._master, "".join(a + "\r\n" for a in answers).encode('ascii'))
+
+    def _delay(self, line):
+        if isinstance(self.latency, dict):
+            key = line.split()[0].decode('ascii').upper() if line.strip() else None
+            latency = self.latency.get(key, self.latency.get(None, 0.))
+        else:
+            latency = self.latency
+        if self.jitter:
+            latency += self._random.uniform(0, self.jitter)
+        if latency > 0:
+            time.sleep(latency)
+
+    def answer(self, command):
+        """Return the answers lines to a command string.
+
+        Parameters
+        ----------
+        command : str
+            command string without end of line
+
+        Returns
+        -------
+        list
+            answers lines without end of line
+        """
+        self.commands += 1
+        if not command:
+            return []
+        words = command.split()
+        handler = self._handlers.get(words[0].upper())
+        if handler is None:
+            # Invalid command
+            self.error_queue.append(-113)
+            return []
+        answers = handler([w.upper() for w in words[1:]])
+        if answers:
+            r = self._random.random()
+            if r < self.drop_rate:
+                return []
+            elif r < self.drop_rate + self.error_rate:
+                return ["#ERR" for a in answers]
+        return answers
+
+    ## device state
+    def _reset(self, params):
+        self.state = 'STOPPED'
+        self.function = 'SLMeter'
+        self.klock = 'ON'
+        self.error_queue = []
+        self._start_time = None
+        self._dt_time = time.monotonic()
+        return []
+
+    def _timer(self):
+        return 0. if self._start_time is None else time.monotonic() - self._start_time
+
+    def _dt(self):
+        return time.monotonic() - self._dt_time
+
+    def _echo(self, params):
+        return [" ".join(params).lower()]
+
+    def _initiate(self, params):
+        if params == ['START']:
+            self.state = 'RUNNING'
+            self._start_time = self._dt_time = time.monotonic()
+        elif params == ['STOP']:
+            self.state = 'STOPPED'
+        else:
+            self.error_queue.append(-108)
+        return []
+
+    def _function(self, params):
+        self.function = params[0] if params else self.function
+        return []
+
+    def _measure_initiate(self, params):
+        self._dt_time = time.monotonic()
+        return []
+
+    def _slm_123(self, params):
+        allowed = {p.value.upper() for p in QUERY_MEAS_SLM_123.ALLOWED_VALUES}
+        if not params or any(p not in allowed for p in params):
+            self.error_queue.append(-108)
+            return []
+        return ["{:.1f} dB, OK".format(self._random.gauss(50., 5.)) for p in params]
+
+    def _rta(self, params):
+        allowed = {p.value.upper() for p in QUERY_MEAS_RTA.ALLOWED_VALUES}
+        if len(params) != 1 or params[0] not in allowed:
+            self.error_queue.append(-108)
+            return []
+        levels = (self._random.gauss(40., 5.) for b in range(self.RTA_BANDS))
+        return [",".join("{:.1f}".format(l) for l in levels) + " dB, OK"]
+
+    def _errors(self, params):
+        errors, self.error_queue = self.error_queue or [0], []
+        return [", ".join(str(e) for e in errors)]
+
+    def _key(self, params):
+        return ["ok"]
+
+    def _klock(self, params):
+        if params in (['ON'], ['OFF']):
+            self.klock = params[0]
+        else:
+            self.error_queue.append(-108)
+        return []
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Pseudo-terminal XL2 device emulator.")
+    parser.add_argument('--latency', type=float, default=0., help="answer latency in seconds")
+    parser.add_argument('--jitter', type=float, default=0., help="max random delay added to the latency")
+    parser.add_argument('--drop-rate', type=float, default=0., help="probability of a dropped answer")
+    parser.add_argument('--error-rate', type=float, default=0., help="probability of a malformed answer")
+    args = parser.parse_args()
+    with XL2Emulator(args.latency, args.jitter, args.drop_rate, args.error_rate) as emu:
+        print(emu.serialDev)
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
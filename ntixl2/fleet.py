@@ -0,0 +1,228 @@
+"""The fleet.py module implement the control of many XL2 devices connected to the same host.
+
+Every device of a :class:`ntixl2.fleet.XL2Fleet` is driven by its own worker thread, so the cycle time of a fleet \
+poll is the round trip time of the slowest device and not the sum of all round trip times. Broadcast messages (eg. \
+:meth:`XL2Fleet.start`) are released to all workers at the same instant by a barrier and the spread of the send \
+times (skew) is reported.
+
+Example
+-------
+>>> with XL2Fleet.discover() as fleet:
+...     skew = fleet.start()
+...     levels = fleet.poll(slm_query)
+...     fleet.stop()
+
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .xl2 import XL2SLM, find_xl2
+from .message import INITIATE
+
+
+class XL2Fleet(object):
+    """Many XL2 devices driven concurrently.
+
+    Attributes
+    ----------
+    devices : list
+        list of :class:`ntixl2.xl2.XL2SLM` objects
+    last_skew : float
+        skew in seconds of the last broadcast, see :meth:`broadcast`
+
+    """
+
+    def __init__(self, devices):
+        """Initiate
+
+        Parameters
+        ----------
+        devices : list
+            list of :class:`ntixl2.xl2.XL2SLM` objects
+
+        """
+        self.devices = list(devices)
+        self.last_skew = None
+        self._pool = ThreadPoolExecutor(max_workers=max(len(self.devices), 1))
+
+    @classmethod
+    def discover(cls, filter="XL2", mountDir='/media/XL2-sd-{serial_number}'):
+        """Create a fleet with all XL2 devices connected in serial modus.
+
+        Parameters
+        ----------
+        filter : str
+            see :func:`ntixl2.xl2.find_xl2`
+        mountDir : str
+            mount directory template of the devices. Formatted with the port attributes returned by\
+            :func:`ntixl2.xl2.find_xl2`
+
+        Returns
+        -------
+        :class:`ntixl2.fleet.XL2Fleet`
+
+        Note
+        ----
+        The storage device of a serial port is unknown, the devices are created with `storageDev=None` and can't\
+        switch status, see :meth:`switch_to_mass`.
+
+        """
+        devices = [XL2SLM(mountDir.format(**p), serialDev=p['device'], storageDev=None)
+                   for p in find_xl2(filter=filter)]
+        return cls(devices)
+
+    def __len__(self):
+        return len(self.devices)
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def open(self):
+        """Open a serial session on every device, see :meth:`ntixl2.xl2.XL2SLM.open`."""
+        self._map(lambda d: d.open())
+        return self
+
+    def close(self):
+        """Close the serial session of every device."""
+        self._map(lambda d: d.close(), return_exceptions=True)
+
+    def shutdown(self):
+        """Close the devices and stop the worker threads."""
+        self.close()
+        self._pool.shutdown()
+
+    def _map(self, func, return_exceptions=False):
+        # run func(device) concurrently on all devices, keep device order
+        futures = [self._pool.submit(func, d) for d in self.devices]
+        return self._collect(futures, return_exceptions)
+
+    @staticmethod
+    def _collect(futures, return_exceptions):
+        ret = []
+        for f in futures:
+            e = f.exception()
+            if e is not None and not return_exceptions:
+                raise e
+            ret.append(e if e is not None else f.result())
+        return ret
+
+    def poll(self, message, wait=5, return_exceptions=False):
+        """Send a message to all devices concurrently.
+
+        Parameters
+        ----------
+        message : :obj:`ntixl2.message.Message` object
+            message, the same object is sent to all devices
+        wait : float
+            see :meth:`ntixl2.xl2.XL2SLM.serial_message`
+        return_exceptions : bool
+            if True the exception raised by a device is returned in place of its answers, else the first exception\
+            is raised after all devices answered
+
+        Returns
+        -------
+        list
+            parsed answers of each device in the :attr:`devices` order
+
+        """
+        return self._map(lambda d: d.serial_message(message, wait), return_exceptions)
+
+    def broadcast(self, message, wait=5, return_exceptions=False):
+        """Send a message to all devices at the same instant.
+
+        The worker threads wait on a barrier and send the message once all of them are ready. The skew is computed\
+        from the write start times of the messages, see :attr:`ntixl2.stats.CommandRecord.start`.
+
+        Parameters
+        ----------
+        message : :obj:`ntixl2.message.Message` object
+            message, the same object is sent to all devices
+        wait : float
+            see :meth:`ntixl2.xl2.XL2SLM.serial_message`
+        return_exceptions : bool
+            see :meth:`poll`
+
+        Returns
+        -------
+        tuple
+            (list of parsed answers of each device, skew). The skew is the spread in seconds of the send times.
+
+        Note
+        ----
+        Open the devices session (:meth:`open`) before a broadcast, else the port opening is part of the skew.
+
+        """
+        if not self.devices:
+            return [], 0.
+        barrier = threading.Barrier(len(self.devices))
+        sent = [None] * len(self.devices)
+
+        def send(i, device):
+            def hook(record):
+                if sent[i] is None:
+                    sent[i] = record.start
+            device.add_hook(hook)
+            try:
+                barrier.wait()
+                return device.serial_message(message, wait)
+            finally:
+                device.remove_hook(hook)
+
+        futures = [self._pool.submit(send, i, d) for i, d in enumerate(self.devices)]
+        ret = self._collect(futures, return_exceptions)
+        sent = [t for t in sent if t is not None]
+        self.last_skew = max(sent) - min(sent) if sent else None
+        return ret, self.last_skew
+
+    def start(self):
+        """Start the measurement on all devices, see :meth:`broadcast`.
+
+        Returns
+        -------
+        float
+            skew in seconds
+
+        """
+        return self.broadcast(INITIATE.START())[1]
+
+    def stop(self):
+        """Stop the measurement on all devices, see :meth:`broadcast`.
+
+        Returns
+        -------
+        float
+            skew in seconds
+
+        """
+        return self.broadcast(INITIATE.STOP())[1]
+
+    def switch_to_mass(self):
+        """Switch all devices to MASS status in parallel, see :meth:`ntixl2.xl2.XL2SLM.switch_to_mass`.
+
+        The devices need a storage device, the switch of a device with `storageDev=None` (eg. created by\
+        :meth:`discover`) fails with :class:`ntixl2.xl2.XL2Error`.
+
+        Returns
+        -------
+        list
+            list of :class:`ntixl2.xl2.ModeSwitch` futures in the :attr:`devices` order. Use\
+            :func:`concurrent.futures.as_completed` to process the devices as soon as they are mounted.
+
+        """
+        return [d.switch_to_mass() for d in self.devices]
+
+    def switch_to_serial(self):
+        """Switch all devices to SERIAL status in parallel, see :meth:`ntixl2.xl2.XL2SLM.switch_to_serial`.
+
+        The devices need a storage device, see :meth:`switch_to_mass`.
+
+        Returns
+        -------
+        list
+            list of :class:`ntixl2.xl2.ModeSwitch` futures in the :attr:`devices` order.
+
+        """
+        return [d.switch_to_serial() for d in self.devices]
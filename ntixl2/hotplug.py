@@ -0,0 +1,177 @@
+"""The hotplug.py module implement the watching of device files and mount points.
+
+The XL2 switch between SERIAL and MASS status is seen by the host as the removal and the creation of the \
+device files (the `udev` symlinks) and as a change of the mount table. The :class:`PathWatcher` object wait for these \
+events using the linux `inotify` interface and the polling of `/proc/self/mounts`, so \
+:meth:`ntixl2.xl2.XL2SLM.to_mass` and :meth:`ntixl2.xl2.XL2SLM.to_serial` return as soon as the new status is usable \
+instead of sleeping a fixed time.
+
+Note
+----
+- **The implementation is for linux systems only**. If `inotify` is not available the watcher falls back to polling.
+
+"""
+
+import os
+import time
+import select
+import ctypes
+import ctypes.util
+
+# inotify events
+IN_ATTRIB = 0x00000004
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+
+
+def _libc():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+_LIBC = _libc()
+
+
+class PathWatcher(object):
+    """Wait for changes of directories entries and of the mount table.
+
+    Attributes
+    ----------
+    dirs : list
+        watched directories
+    inotify : bool
+        True if `inotify` is used, else the watcher only wait the polling interval
+
+    """
+
+    def __init__(self, dirs, mounts=True):
+        """Initiate
+
+        Parameters
+        ----------
+        dirs : list
+            directories to watch. Not existing directories are ignored.
+        mounts : bool
+            if True watch the mount table too
+
+        """
+        self.dirs = [str(d) for d in dirs if os.path.isdir(str(d))]
+        self._poll = select.poll()
+        self._fd = None
+        self._mounts = None
+        if _LIBC is not None:
+            fd = _LIBC.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd >= 0:
+                self._fd = fd
+                for d in self.dirs:
+                    _LIBC.inotify_add_watch(fd, d.encode(), WATCH_MASK)
+                self._poll.register(fd, select.POLLIN)
+        if mounts and os.path.exists('/proc/self/mounts'):
+            self._mounts = open('/proc/self/mounts')
+            self._mounts.read()
+            self._poll.register(self._mounts, select.POLLPRI | select.POLLERR)
+        self.inotify = self._fd is not None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Stop watching."""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        if self._mounts is not None:
+            self._mounts.close()
+            self._mounts = None
+
+    def wait(self, timeout):
+        """Wait for an event.
+
+        Parameters
+        ----------
+        timeout : float
+            max waiting time in seconds
+
+        Returns
+        -------
+        bool
+            True if an event occurred, False if timeout
+        """
+        events = self._poll.poll(max(timeout, 0) * 1000)
+        for fd, ev in events:
+            if fd == self._fd:
+                # drain, the events content is not needed
+                try:
+                    while os.read(self._fd, 4096):
+                        pass
+                except BlockingIOError:
+                    pass
+            elif self._mounts is not None and fd == self._mounts.fileno():
+                self._mounts.seek(0)
+                self._mounts.read()
+        return bool(events)
+
+    def wait_until(self, predicate, timeout, interval=1.):
+        """Wait till predicate is True.
+
+        The predicate is evaluated after every event and at least every `interval` seconds.
+
+        Parameters
+        ----------
+        predicate : callable
+            function without arguments
+        timeout : float
+            max waiting time in seconds
+        interval : float
+            max time between two predicate evaluations
+
+        Returns
+        -------
+        bool
+            True if the predicate is True, False if timeout
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            if predicate():
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            self.wait(min(interval, remaining))
+
+
+def wait_until(predicate, dirs, timeout, interval=1.):
+    """Wait till predicate is True, see :meth:`PathWatcher.wait_until`.
+
+    Parameters
+    ----------
+    predicate : callable
+        function without arguments
+    dirs : list
+        directories to watch
+    timeout : float
+        max waiting time in seconds
+    interval : float
+        max time between two predicate evaluations
+
+    Returns
+    -------
+    bool
+        True if the predicate is True, False if timeout
+    """
+    with PathWatcher(dirs) as w:
+        return w.wait_until(predicate, timeout, interval)
@@ -33,11 +33,26 @@ Todo
 
 from collections import namedtuple
 import itertools
+import re
 import parse
+import numpy as np
 
 ########### Messages ##############
 
-class Message(object):
+class _MessageType(type):
+    """Message metaclass: message instances have `__slots__`.
+
+    The messages classes only define class attributes, the instances hold at most the parameter. `__slots__` is\
+    added to every message class which does not define it, so no instance `__dict__` is allocated.
+
+    """
+
+    def __new__(mcs, name, bases, namespace):
+        namespace.setdefault('__slots__', ())
+        return super(_MessageType, mcs).__new__(mcs, name, bases, namespace)
+
+
+class Message(object, metaclass=_MessageType):
     """Basic XL2 serial message class
 
     The class has methods for the creation (:meth:`to_str`) of XL2 messages and methods\
@@ -82,14 +97,36 @@ class Message(object):
         """
         return self.ROOT + self.EOL
 
+    def to_bytes(self):
+        """Return the serial message encoded for the serial communication.
+
+        Note
+        ----
+        Messages without parameters are immutable, the encoded message is cached per class.
+
+        """
+        cls = type(self)
+        encoded = cls.__dict__.get('_encoded')
+        if encoded is None:
+            encoded = cls._encoded = self.to_str().encode('ascii')
+        return encoded
+
     def return_lines(self):
         """Return the expected number of return lines of the message."""
         return 1
 
+    @classmethod
+    def _template(cls):
+        """Return the RETURN template compiled once per class."""
+        template = cls.__dict__.get('_compiled')
+        if template is None:
+            template = cls._compiled = parse.compile(cls.RETURN + cls.EOL)
+        return template
+
     def _parse(self, line):
         """Parse answers line according to RETURN  class attribute."""
         if self.RETURN is not None:
-            p = parse.compile(self.RETURN + self.EOL)
+            p = self._template()
             try:
                 ret = p.parse(line).named
             except AttributeError as e:
@@ -125,6 +162,35 @@ ParamValue = namedtuple("ParamValue", ['value', 'description', 'requiredOption']
 ParamValue.__new__.__defaults__ = (None, '', 'BASE')
 
 
+class ParamTable(object):
+    """Immutable table of the allowed values of a categorical parameter.
+
+    The table is built once per message class and shared by all message instances. The value lookup is a dict\
+    lookup, case insensitive as the XL2 messages.
+
+    Attributes
+    ----------
+    allowedValues : tuple
+        allowed :obj:`ParamValue`
+    values : tuple
+        allowed values strings
+    index : dict
+        value string to index in :attr:`values`
+
+    """
+
+    __slots__ = ('allowedValues', 'values', 'index')
+
+    def __init__(self, allowedValues, options=('BASE',)):
+        self.allowedValues = tuple(av for av in allowedValues if av.requiredOption in options)
+        self.values = tuple(av.value for av in self.allowedValues)
+        self.index = {}
+        for i, v in enumerate(self.values):
+            self.index.setdefault(v, i)
+        for i, v in enumerate(self.values):
+            self.index.setdefault(v.upper(), i)
+
+
 class CategoricalParam(object):
     """Serial message parameter of type categorical.
 
@@ -136,32 +202,24 @@ class CategoricalParam(object):
 
     """
 
+    __slots__ = ('description', 'options', 'table', 'allowedValues', 'repeatAllowed', 'param_list', 'delimiter')
+
     def __init__(self, description, allowedValues=None, repeatAllowed=1,
-                 delimiter=" ", options=['BASE']):
+                 delimiter=" ", options=['BASE'], table=None):
         self.description = description
         self.options = options
-        self.allowedValues = self._filter(allowedValues)
+        self.table = ParamTable(allowedValues, options) if table is None else table
+        self.allowedValues = self.table.allowedValues
         self.repeatAllowed = repeatAllowed
         """ int : Max length of parameter list"""
         self.param_list = []
         self.delimiter = delimiter
 
-    def _filter(self, allowedValues):
-        return [av for av in allowedValues if av.requiredOption in self.options]
-
-    def _match_value(self, value):
-        try:
-            index = [av.value for av in self.allowedValues].index(value)
-        except ValueError:
-            return False
-        else:
-            return index
-
     def append_param(self, value):
         """Append parameter to parameter list."""
-        if len(self.param_list) <= self.repeatAllowed:
-            index = self._match_value(value)
-            if type(index) == int:
+        if len(self.param_list) < self.repeatAllowed:
+            index = self.table.index.get(value)
+            if index is not None:
                 self.param_list.append(index)
             else:
                 raise ValueError('Value {} is not allowed. See allowedValues attribute'.format(value))
@@ -177,9 +235,9 @@ class CategoricalParam(object):
             If  True remove last element from parameter list else remove all elements
         """
         if last:
-            self.param_list = self.param_list[:-1]
+            del self.param_list[-1:]
         else:
-            self.param_list = []
+            del self.param_list[:]
 
     def set_param(self, value: str):
         """ Set parameter or replace last parameter in parameter list."""
@@ -188,17 +246,17 @@ class CategoricalParam(object):
 
     def to_str(self):
         """Translate parameter list to string for serial communication"""
-        l = [self.allowedValues[i].value for i in self.param_list]
-        if len(l):
-            return self.delimiter.join(l)
+        if len(self.param_list):
+            values = self.table.values
+            return self.delimiter.join([values[i] for i in self.param_list])
         else:
             raise UserWarning('There are no param')
 
     def parameter_list(self):
         """Return list of parameter names."""
-        l = [self.allowedValues[i].value for i in self.param_list]
-        if len(l):
-            return l
+        if len(self.param_list):
+            values = self.table.values
+            return [values[i] for i in self.param_list]
         else:
             raise UserWarning('There are no param')
 
@@ -206,6 +264,8 @@ class CategoricalParam(object):
 class NumericalParam(object):
     """Serial message parameter of type numerical"""
 
+    __slots__ = ('description', 'allowedValues', 'value')
+
     def __init__(self, description, min=None, max=None):
         self.description = description
         self.allowedValues = {'min': min, 'max': max}
@@ -255,10 +315,14 @@ class MessageWithParam(Message):
     # number of repetition allowed
     REPEAT_PARAM = 1
 
+    __slots__ = ('param', '_bytes')
+
     def __init__(self):
+        # encoded message cache, reset at every parameter change
+        self._bytes = None
         if self.PARAM_TYPE == 'categorical':
-            self.param = CategoricalParam(self.PARAM_NAME, allowedValues=self.ALLOWED_VALUES,
-                                          repeatAllowed=self.REPEAT_PARAM)
+            self.param = CategoricalParam(self.PARAM_NAME, repeatAllowed=self.REPEAT_PARAM,
+                                          table=self._param_table())
         elif self.PARAM_TYPE == 'numerical':
             self.param = NumericalParam(self.PARAM_NAME, self.ALLOWED_VALUES[0], self.ALLOWED_VALUES[1])
         else:
@@ -276,10 +340,30 @@ class MessageWithParam(Message):
         param = self.param.to_str()
         return self.ROOT.format(param) + self.EOL
 
+    def to_bytes(self):
+        """Return the serial message encoded for the serial communication.
+
+        Note
+        ----
+        The encoded message is cached till the next parameter change.
+
+        """
+        if self._bytes is None:
+            self._bytes = self.to_str().encode('ascii')
+        return self._bytes
+
+    @classmethod
+    def _param_table(cls):
+        """Return the categorical parameter table, built once per class."""
+        table = cls.__dict__.get('_table')
+        if table is None:
+            table = cls._table = ParamTable(cls.ALLOWED_VALUES)
+        return table
+
     def allowed_param_values(self, short=True):
         """Return list of allowed parameter strings."""
         if short and self.PARAM_TYPE == "categorical":
-            return [p.value for p in self.param.allowedValues]
+            return list(self.param.table.values)
         else:
             return self.param.allowedValues
 
@@ -296,6 +380,7 @@ class MessageWithParam(Message):
             parameter value
 
         """
+        self._bytes = None
         self.param.set_param(value.upper())
 
     def rm_param(self, last=False):
@@ -306,6 +391,7 @@ class MessageWithParam(Message):
         last : bool
             if  False remove all parameters from list else remove the last one.
         """
+        self._bytes = None
         self.param.rm_param(last)
 
 
@@ -324,7 +410,86 @@ class MessageWithParams(MessageWithParam):
         value : str
             parameter value
         """
-        self.param.append_param(value)
+        self._bytes = None
+        self.param.append_param(value.upper())
+
+
+class CommandBatch(object):
+    """Batch of XL2 messages sent with a single serial write.
+
+    The batch behaves like a :class:`Message`: :meth:`to_str` concatenates the message strings and\
+    :meth:`parse_answers` routes the returned lines, in order, to the :meth:`Message.parse_answers` of each\
+    message. A full measurement snapshot costs so a single round trip.
+
+    Example
+    -------
+    >>> batch = CommandBatch([MEASURE_INITIATE(), slm_query, QUERY_INITIATE_STATE()])
+    >>> meas, levels, state = xl2.serial_message(batch)
+
+    Note
+    ----
+    Messages without answers are not checked for an unexpected answer. An unexpected line shifts the answers of the\
+    following messages and is reported as parse error.
+
+    Attributes
+    ----------
+    messages : list
+        list of messages in the batch
+
+    """
+
+    EOL = Message.EOL
+
+    def __init__(self, messages=()):
+        self.messages = list(messages)
+
+    def append(self, message):
+        """Append message to the batch."""
+        self.messages.append(message)
+
+    @property
+    def RETURN(self):
+        """:obj:`str`: answers template of the first message with answers, `None` if no message has answers."""
+        for m in self.messages:
+            if m.RETURN is not None:
+                return m.RETURN
+        return None
+
+    def to_str(self):
+        """Return the serial string of all messages."""
+        return "".join(m.to_str() for m in self.messages)
+
+    def to_bytes(self):
+        """Return the encoded serial string of all messages."""
+        return b"".join(m.to_bytes() for m in self.messages)
+
+    def return_lines(self):
+        """Return the expected number of return lines of the whole batch."""
+        return sum(m.return_lines() for m in self.messages if m.RETURN is not None)
+
+    def parse_answers(self, lines):
+        """Parse XL2 answers of the batch.
+
+        Parameters
+        ----------
+        lines : list
+            list containing XL2 answers lines to the batch
+
+        Returns
+        -------
+        list
+            parsed answers of each message. `None` for messages without answers.
+        """
+        assert len(lines) == self.return_lines()
+        ret, i = [], 0
+        for m in self.messages:
+            if m.RETURN is None:
+                ret.append(None)
+            else:
+                n = m.return_lines()
+                ret.append(m.parse_answers(lines[i:i + n]))
+                i += n
+        return ret
 
 ########################
 # Debug Mesages
@@ -500,16 +665,236 @@ class QUERY_MEAS_SLM_123(MessageWithParams):
     PARAM_TYPE = "categorical"
     PARAM_NAME = "noiseStatistics"
     ALLOWED_VALUES = [ParamValue(*p) for p in STATISTICS]
+    REPEAT_PARAM = len(STATISTICS)
 
     def return_lines(self):
         return len(self.param.parameter_list())
 
+    # one answer line per match, anchored to the line start and end
+    _LINE_RE = re.compile(r'^[ \t]*(\S+)[ \t]+dB,[ \t]*(\S.*?)[ \t]*$', re.MULTILINE)
+
     def parse_answers(self, lines):
         ret = {}
         for p, line in zip(self.param.parameter_list(), lines):
             ret[p] = self._parse(line)
         return ret
 
+    def decode_answers(self, lines, out=None):
+        """Fast decoding of the XL2 answers to arrays.
+
+        All lines are decoded by a single regular expression scan and a single float conversion, which is much faster\
+        than :meth:`parse_answers` for queries of many parameters.
+
+        Parameters
+        ----------
+        lines : list
+            list containing XL2 answers lines to message
+        out : :class:`numpy.ndarray`
+            optional float array (eg. a row of a 2D array) of length :meth:`return_lines` where the levels are written
+
+        Returns
+        -------
+        tuple
+            (levels, status). `levels` float array (`out` if given) and `status` string array, both in the parameters\
+            order.
+
+        Raises
+        ------
+        AttributeError
+            if a line is not a level answer, as :meth:`parse_answers`
+        """
+        block = "\n".join(line.rstrip(self.EOL) for line in lines)
+        found = self._LINE_RE.findall(block)
+        try:
+            if len(found) != len(lines):
+                raise ValueError
+            if out is None:
+                out = np.asarray([f[0] for f in found], dtype=np.float64)
+            else:
+                out[:] = [f[0] for f in found]
+        except ValueError:
+            # locate the malformed line and raise the parse_answers error
+            for line in lines:
+                self._parse(line)
+            raise AttributeError("not able to parse return string '{}'".format(block))
+        return out, np.asarray([f[1] for f in found])
+
+
+class SLMSnapshot(CommandBatch):
+    """Batch of a :class:`MEASURE_INITIATE` and a :class:`QUERY_MEAS_SLM_123` of all the `STATISTICS` values.
+
+    The answers are decoded by :meth:`QUERY_MEAS_SLM_123.decode_answers` straight into a record of :attr:`DTYPE`,\
+    no dict is created.
+
+    Example
+    -------
+    >>> table = np.zeros(3600, dtype=SLMSnapshot.DTYPE)
+    >>> batch = SLMSnapshot(out=table, row=0)
+    >>> rec = xl2.serial_message(batch)
+    >>> rec['LAEQ'], table['LAEQ'][0]
+
+    Attributes
+    ----------
+    DTYPE : :class:`numpy.dtype`
+        record fields: `time` (wall clock time of the query, set by :meth:`ntixl2.xl2.XL2SLM.snapshot`), one float\
+        field per `STATISTICS` value and `flags`, a bitmask of the values whose status is not 'OK' (bit `i` for the\
+        `i`-th value)
+    out : :class:`numpy.ndarray`
+        1D array of :attr:`DTYPE` where the answers are written, if `None` a new record is created for every answer
+    row : int
+        index of the record in `out`
+
+    """
+
+    DTYPE = np.dtype([('time', np.float64)] + [(p[0], np.float64) for p in STATISTICS] + [('flags', np.uint64)])
+
+    def __init__(self, out=None, row=0):
+        query = QUERY_MEAS_SLM_123()
+        for p in STATISTICS:
+            query.append_param(p[0])
+        super(SLMSnapshot, self).__init__([MEASURE_INITIATE(), query])
+        if out is not None and out.dtype != self.DTYPE:
+            raise ValueError('out dtype has to be SLMSnapshot.DTYPE')
+        self.out = out
+        self.row = row
+
+    def parse_answers(self, lines):
+        """Decode XL2 answers of the batch.
+
+        Parameters
+        ----------
+        lines : list
+            list containing XL2 answers lines to the batch
+
+        Returns
+        -------
+        :class:`numpy.void`
+            record of :attr:`DTYPE`, a view on `out[row]` if :attr:`out` is set
+        """
+        assert len(lines) == self.return_lines()
+        out = np.zeros(1, self.DTYPE) if self.out is None else self.out
+        # a single record is always contiguous, its fields are 8 bytes each
+        rec = out[self.row:self.row + 1]
+        n = len(STATISTICS)
+        _, status = self.messages[1].decode_answers(lines, out=rec.view(np.float64)[1:n + 1])
+        flags = 0
+        for i in np.flatnonzero(status != 'OK'):
+            flags |= 1 << int(i)
+        rec.view(np.uint64)[n + 1] = flags
+        return rec[0]
+
+# QUERY_MEAS_RTA param and band axes
+RTA_STATISTICS = [['LIVE', 'Live spectrum', 'BASE'],
+                  ['LZS', 'Z weighted SLOW(1. sec) time average spectrum', 'BASE'],
+                  ['LZSMAX', '', 'BASE'],
+                  ['LZSMIN', '', 'BASE'],
+                  ['LZF', 'Z weighted FAST(0.125 sec) time average spectrum', 'BASE'],
+                  ['LZFMAX', '', 'BASE'],
+                  ['LZFMIN', '', 'BASE'],
+                  ['LZEQ', 'Z weighted equivalent spectrum', 'BASE']]
+
+# nominal band center frequencies in Hz, as in the XL2 RTA log files
+THIRD_OCTAVE_BANDS = np.array([6.3, 8, 10, 12.5, 16, 20, 25, 31.5, 40, 50, 63, 80, 100, 125, 160, 200, 250, 315,
+                               400, 500, 630, 800, 1000, 1250, 1600, 2000, 2500, 3150, 4000, 5000, 6300, 8000,
+                               10000, 12500, 16000, 20000], dtype=np.float32)
+OCTAVE_BANDS = np.array([8, 16, 31.5, 63, 125, 250, 500, 1000, 2000, 4000, 8000, 16000], dtype=np.float32)
+THIRD_OCTAVE_BANDS.flags.writeable = False
+OCTAVE_BANDS.flags.writeable = False
+
+
+def rta_bands(n):
+    """Return the band axis of a spectrum of n values.
+
+    Parameters
+    ----------
+    n : int
+        number of bands
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        :obj:`THIRD_OCTAVE_BANDS` or :obj:`OCTAVE_BANDS`, read-only arrays shared by all spectra
+    """
+    if n == len(THIRD_OCTAVE_BANDS):
+        return THIRD_OCTAVE_BANDS
+    elif n == len(OCTAVE_BANDS):
+        return OCTAVE_BANDS
+    raise ValueError('no RTA resolution with {} bands'.format(n))
+
+
+class QUERY_MEAS_RTA(MessageWithParam):
+    """Queries a RTA spectrum, the levels of all bands in a single answer line.
+
+    The answer is a comma separated list of the band levels, eg. `'36.3,40.8,...,12.1 dB, OK'`. The resolution\
+    (1/3 octave or octave, see RTA resolution of :class:`RESET`) is given by the number of levels.
+
+    Example
+    -------
+    >>> q = QUERY_MEAS_RTA()
+    >>> q.set_param('LZEQ')
+    >>> spectrum = xl2.serial_message(q)
+    >>> spectrum['bands'], spectrum['levels']
+
+    """
+    GROUP = "Measurement"
+    AVAILABILITY = ["SLM"]
+    ROOT = "MEAS:RTA? {}"
+    RETURN = "{levels} dB, {status}"
+    PARAM_TYPE = "categorical"
+    PARAM_NAME = "spectrum"
+    ALLOWED_VALUES = [ParamValue(*p) for p in RTA_STATISTICS]
+
+    def parse_answers(self, lines):
+        """Parse XL2 answers.
+
+        Parameters
+        ----------
+        lines : list
+            list containing XL2 answers lines to message
+
+        Returns
+        -------
+        dict
+            `levels` float32 array, `bands` band center frequencies (see :func:`rta_bands`) and `status`
+        """
+        assert len(lines) == 1
+        levels, status = self.decode_answers(lines)
+        return {'bands': rta_bands(len(levels)), 'levels': levels, 'status': status}
+
+    def decode_answers(self, lines, out=None):
+        """Decode XL2 answers to an array.
+
+        Parameters
+        ----------
+        lines : list
+            list containing XL2 answers lines to message
+        out : :class:`numpy.ndarray`
+            optional float array (eg. a row of a spectrogram) where the levels are written
+
+        Returns
+        -------
+        tuple
+            (levels, status). `levels` float32 array (`out` if given) in band order and `status` string.
+
+        Raises
+        ------
+        AttributeError
+            if the line is not a spectrum answer, as :meth:`Message.parse_answers`
+        """
+        line = lines[0]
+        values, sep, status = line.rstrip(self.EOL).rpartition(' dB')
+        try:
+            if not sep:
+                raise ValueError
+            values = values.split(',')
+            if out is None:
+                out = np.array(values, dtype=np.float32)
+            else:
+                out[:] = values
+        except ValueError:
+            raise AttributeError("not able to parse return string '{}'".format(line))
+        return out, status.lstrip(', ')
+
 ################
 # input messages
 class INPUT_SELECT(Message):
@@ -0,0 +1,196 @@
+"""The parsecache.py module implement a persistent on-disk cache of parsed XL2 log files.
+
+A :class:`ParseCache` wraps the :mod:`ntixl2.xl2parser` entry points. The parsed sections are pickled to a cache \
+directory, one entry per (file path, parser, parser options). An entry is valid if the size and the modification \
+time of the log file are unchanged. If only the modification time changed (eg. the SD card was copied again) the \
+content hash decides. A file appended by the XL2 grows, so its entry is parsed again and replaced. The total size of \
+the cache is bounded, the least recently used entries are removed first.
+
+Example
+-------
+>>> cache = ParseCache(max_bytes=512 * 2 ** 20)
+>>> sections = cache.parse_broadband_file('/media/XL2-sd/Projects/RBL/2016-06-28_SLM_002_123_Log.txt', columnar=True)
+>>> cache.stats
+{'hits': 0, 'misses': 1}
+
+"""
+
+import os
+import pickle
+import hashlib
+from . import xl2parser
+
+DEFAULT_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'ntixl2')
+_SUFFIX = '.xl2cache'
+
+
+def file_hash(file_path, block_size=2 ** 20):
+    """Return the content hash of a file.
+
+    Parameters
+    ----------
+    file_path : str
+        file path
+    block_size : int
+        read size in bytes
+
+    Returns
+    -------
+    str
+        hexadecimal BLAKE2b digest
+    """
+    h = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class ParseCache(object):
+    """Persistent cache of parsed log files with LRU eviction.
+
+    An entry file holds two pickles: the file identity (path, size, modification time, content hash) and the parsed\
+    sections, so a stale entry is detected without loading the sections. The modification time of an entry file is\
+    its last use time.
+
+    Attributes
+    ----------
+    directory : str
+        cache directory
+    max_bytes : int
+        max total size of the entries in bytes, `None` for no limit
+    verify : bool
+        if True the content hash is checked at every lookup, else only if the modification time changed
+    stats : dict
+        number of cache `hits` and `misses`
+
+    """
+
+    def __init__(self, directory=DEFAULT_DIR, max_bytes=256 * 2 ** 20, verify=False):
+        """Initiate
+
+        Parameters
+        ----------
+        directory : str
+            cache directory, created if needed
+        max_bytes : int
+            max total size of the entries in bytes, `None` for no limit
+        verify : bool
+            see :attr:`verify`
+
+        """
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        self.verify = verify
+        self.stats = {'hits': 0, 'misses': 0}
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _entry_path(self, file_path, parser, args, kwargs):
+        key = repr((os.path.abspath(file_path), parser.__module__, parser.__name__, args, sorted(kwargs.items())))
+        return os.path.join(self.directory, hashlib.blake2b(key.encode(), digest_size=16).hexdigest() + _SUFFIX)
+
+    def parse(self, parser, file_path, *args, **kwargs):
+        """Return the parsed file from the cache, parse and store it if missing or stale.
+
+        Parameters
+        ----------
+        parser : callable
+            parser function, eg. :func:`ntixl2.xl2parser.parse_broadband_file`, called as\
+            `parser(file_path, *args, **kwargs)`. The arguments are part of the entry key and must have a stable `repr`.
+        file_path : str
+            log file path
+
+        Returns
+        -------
+        dict
+            parsed sections, see the parser function
+        """
+        file_path = str(file_path)
+        entry = self._entry_path(file_path, parser, args, kwargs)
+        st = os.stat(file_path)
+        identity = {'path': os.path.abspath(file_path), 'size': st.st_size, 'mtime': st.st_mtime_ns}
+        digest = None
+        try:
+            with open(entry, 'rb') as f:
+                cached = pickle.load(f)
+                if cached['size'] == st.st_size:
+                    valid = cached['mtime'] == st.st_mtime_ns and not self.verify
+                    if not valid:
+                        digest = file_hash(file_path)
+                        valid = cached['hash'] == digest
+                    if valid:
+                        ret = pickle.load(f)
+                        self.stats['hits'] += 1
+                        if cached['mtime'] != st.st_mtime_ns:
+                            # same content, new modification time
+                            self._store(entry, dict(identity, hash=digest), ret)
+                        else:
+                            os.utime(entry)
+                        return ret
+        except (OSError, EOFError, pickle.UnpicklingError, KeyError):
+            # missing or broken entry
+            pass
+        self.stats['misses'] += 1
+        if digest is None:
+            digest = file_hash(file_path)
+        ret = parser(file_path, *args, **kwargs)
+        if os.stat(file_path).st_size == st.st_size:
+            # do not store a file appended while parsing
+            self._store(entry, dict(identity, hash=digest), ret)
+        return ret
+
+    def parse_broadband_file(self, file_path, options={}, columnar=False, sections=None):
+        """Cached :func:`ntixl2.xl2parser.parse_broadband_file`."""
+        return self.parse(xl2parser.parse_broadband_file, file_path, options=options, columnar=columnar,
+                          sections=sections)
+
+    def parse_spectrum_file(self, file_path, options={}, sections=None):
+        """Cached :func:`ntixl2.xl2parser.parse_spectrum_file`."""
+        return self.parse(xl2parser.parse_spectrum_file, file_path, options=options, sections=sections)
+
+    def _store(self, entry, identity, sections):
+        tmp = '{}.{}.tmp'.format(entry, os.getpid())
+        with open(tmp, 'wb') as f:
+            pickle.dump(identity, f, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(sections, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, entry)
+        self.evict()
+
+    def _entries(self):
+        ret = []
+        for e in os.scandir(self.directory):
+            if e.name.endswith(_SUFFIX):
+                try:
+                    st = e.stat()
+                except OSError:
+                    continue
+                ret.append((st.st_mtime, st.st_size, e.path))
+        return ret
+
+    @property
+    def size(self):
+        """int: total size of the entries in bytes."""
+        return sum(s for t, s, p in self._entries())
+
+    def evict(self):
+        """Remove the least recently used entries until the cache size is at most :attr:`max_bytes`."""
+        if self.max_bytes is None:
+            return
+        entries = sorted(self._entries())
+        total = sum(s for t, s, p in entries)
+        for t, s, p in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+            total -= s
+
+    def clear(self):
+        """Remove all entries."""
+        for t, s, p in self._entries():
+            try:
+                os.remove(p)
+            except OSError:
+                pass
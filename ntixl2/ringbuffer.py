@@ -0,0 +1,312 @@
+"""The ringbuffer.py module implement bounded in-memory time series of XL2 measurement records.
+
+A :class:`RingBuffer` holds the last `capacity` records of a NumPy structured dtype (by default \
+:attr:`ntixl2.message.SLMSnapshot.DTYPE`) in preallocated columns. The storage is mirrored: every record is written \
+twice, at `i` and at `i + capacity`, so the last `n` records are always a contiguous slice and queries return views \
+without copy. A :class:`TieredBuffer` adds coarser ring buffers filled by the aggregation of the finer ones \
+(eg. 1 s -> 1 min -> 15 min), the memory use of a week-long run is fixed from the start. A \
+:class:`SpectrogramBuffer` holds RTA spectra, see :class:`ntixl2.message.QUERY_MEAS_RTA`.
+
+Example
+-------
+>>> buf = TieredBuffer(3600)
+>>> with xl2:
+...     for s in sample_snapshots(xl2, period=1, buffer=buf, count=7200):
+...         pass
+>>> buf.window(300)['LAEQ']           # last 5 minutes, 1 second resolution
+>>> buf.tiers[1].window(3600)['LAEQ']  # last hour, 1 minute resolution
+
+"""
+
+import warnings
+import numpy as np
+from .message import SLMSnapshot
+
+
+class RingBuffer(object):
+    """Fixed capacity time series of records.
+
+    Attributes
+    ----------
+    capacity : int
+        max number of records
+    dtype : :class:`numpy.dtype`
+        record dtype. It must have a float `time` field, see :meth:`window`.
+    count : int
+        number of records appended since the creation, including the overwritten ones
+
+    """
+
+    def __init__(self, capacity, dtype=SLMSnapshot.DTYPE):
+        """Initiate
+
+        Parameters
+        ----------
+        capacity : int
+            max number of records
+        dtype : :class:`numpy.dtype`
+            record dtype
+
+        """
+        if capacity < 1:
+            raise ValueError('capacity has to be at least 1')
+        self.capacity = int(capacity)
+        self.dtype = np.dtype(dtype)
+        self.count = 0
+        # mirrored storage, record i is at i and i + capacity
+        self._data = np.zeros(2 * self.capacity, self.dtype)
+        self._head = 0
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, record):
+        """Append a record, the oldest record is overwritten if the buffer is full.
+
+        Parameters
+        ----------
+        record : :class:`numpy.void` or tuple
+            record of :attr:`dtype`
+        """
+        h = self._head
+        self._data[h] = record
+        self._data[h + self.capacity] = record
+        self._head = h + 1 if h + 1 < self.capacity else 0
+        self.count += 1
+
+    def clear(self):
+        """Remove all records."""
+        self.count = 0
+        self._head = 0
+
+    def last(self, n=None):
+        """Return the last records.
+
+        Parameters
+        ----------
+        n : int
+            number of records, all the records if `None`
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            view of the records, oldest first. The view is valid until the records are overwritten.
+        """
+        size = len(self)
+        n = size if n is None else max(min(n, size), 0)
+        end = self._head + self.capacity
+        return self._data[end - n:end]
+
+    @property
+    def values(self):
+        """:class:`numpy.ndarray`: view of all records, oldest first."""
+        return self.last()
+
+    def window(self, seconds, end=None):
+        """Return the records of the last seconds.
+
+        Parameters
+        ----------
+        seconds : float
+            window length in seconds
+        end : float
+            window end time, the time of the last record if `None`
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            view of the records whose `time` is in `(end - seconds, end]`, oldest first
+        """
+        values = self.last()
+        if not len(values):
+            return values
+        times = values['time']
+        end = times[-1] if end is None else end
+        i, j = np.searchsorted(times, [end - seconds, end], side='right')
+        return values[i:j]
+
+
+def aggregate(records):
+    """Aggregate records of :attr:`ntixl2.message.SLMSnapshot.DTYPE` like fields.
+
+    Fields named `L...MAX` are aggregated by maximum, `L...MIN` by minimum, the other `L...` levels by energetic\
+    average. `flags` are or-ed, `time` is the time of the first record and the other fields are averaged.
+
+    Parameters
+    ----------
+    records : :class:`numpy.ndarray`
+        records to aggregate, not empty
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        0-d array with the aggregated record
+    """
+    ret = np.zeros((), records.dtype)
+    for name in records.dtype.names:
+        col = records[name]
+        if name == 'time':
+            ret[name] = col[0]
+        elif name == 'flags':
+            ret[name] = np.bitwise_or.reduce(col)
+        elif name.startswith('L') and name.endswith('MAX'):
+            ret[name] = col.max()
+        elif name.startswith('L') and name.endswith('MIN'):
+            ret[name] = col.min()
+        elif name.startswith('L'):
+            ret[name] = 10 * np.log10(np.mean(10 ** (col / 10.)))
+        else:
+            ret[name] = col.mean()
+    return ret
+
+
+class TieredBuffer(RingBuffer):
+    """Ring buffer with downsampled tiers.
+
+    The records are appended to the finest tier (the buffer itself). When the time of a record enters a new period of\
+    a coarser tier, the records of the previous period in the finer tier are aggregated into one record of the coarser\
+    tier.
+
+    Attributes
+    ----------
+    tiers : list
+        list of :class:`RingBuffer`, the buffer itself first, then the coarser tiers
+    periods : list
+        aggregation period in seconds of each coarser tier
+
+    """
+
+    def __init__(self, capacity, dtype=SLMSnapshot.DTYPE, tiers=((60, 24 * 60), (900, 7 * 24 * 4)),
+                 aggregate=aggregate):
+        """Initiate
+
+        Parameters
+        ----------
+        capacity : int
+            max number of records of the finest tier
+        dtype : :class:`numpy.dtype`
+            record dtype
+        tiers : list
+            (period in seconds, capacity) of the coarser tiers, finest first. The default tiers keep 1 day of\
+            1 minute records and 1 week of 15 minutes records. A tier must hold the records of one period of the next\
+            coarser tier, else the aggregation only sees the last records of the period. The capacity of a coarser\
+            tier is checked against the period ratio, `capacity` has to hold one period of the first coarser tier at\
+            the sampling rate (eg. 60 records for 1 minute at 1 Hz).
+        aggregate : callable
+            function aggregating an array of records into one record, see :func:`aggregate`
+
+        """
+        super(TieredBuffer, self).__init__(capacity, dtype)
+        self.periods = [float(p) for p, c in tiers]
+        for (p, c), (q, d) in zip(tiers, tiers[1:]):
+            if c * p < q:
+                raise ValueError('a tier of {} records of {} s can not hold a {} s period'.format(c, p, q))
+        self.tiers = [self] + [RingBuffer(c, dtype) for p, c in tiers]
+        self._aggregate = aggregate
+        # current period index and number of finer records in it, per coarser tier
+        self._bucket = [None] * len(self.periods)
+        self._pending = [0] * len(self.periods)
+        self._new = np.zeros((), self.dtype)
+
+    def clear(self):
+        """Remove all records of all tiers."""
+        super(TieredBuffer, self).clear()
+        for tier in self.tiers[1:]:
+            tier.clear()
+        self._bucket = [None] * len(self.periods)
+        self._pending = [0] * len(self.periods)
+
+    def append(self, record):
+        """Append a record to the finest tier and aggregate the completed periods.
+
+        Parameters
+        ----------
+        record : :class:`numpy.void` or tuple
+            record of :attr:`dtype`
+        """
+        self._new[()] = record
+        self._add(0, self._new)
+
+    def _add(self, level, rec):
+        # append rec to self.tiers[level], aggregate first the completed period of the next coarser tier
+        tier = self.tiers[level]
+        if level < len(self.periods):
+            bucket = int(rec['time'] // self.periods[level])
+            if self._bucket[level] is not None and bucket != self._bucket[level]:
+                # records of the completed period
+                if self._pending[level] > tier.capacity:
+                    warnings.warn('tier {} holds {} of the {} records of a period'.format(
+                        level, tier.capacity, self._pending[level]), UserWarning)
+                agg = self._aggregate(tier.last(self._pending[level]))
+                agg['time'] = self._bucket[level] * self.periods[level]
+                self._add(level + 1, agg)
+                self._pending[level] = 0
+            self._bucket[level] = bucket
+            self._pending[level] += 1
+        RingBuffer.append(tier, rec)
+
+
+class SpectrogramBuffer(RingBuffer):
+    """Fixed capacity time series of spectra.
+
+    The records have a `time` field and a `levels` field of one float32 level per band, so :attr:`spectrogram` is a\
+    (n_spectra, n_bands) view without copy.
+
+    Example
+    -------
+    >>> q = QUERY_MEAS_RTA()
+    >>> q.set_param('LZF')
+    >>> spec = SpectrogramBuffer(3600, THIRD_OCTAVE_BANDS)
+    >>> with xl2:
+    ...     for i in range(60):
+    ...         spec.append_spectrum(time.time(), xl2.serial_message(q)['levels'])
+    >>> spec.spectrogram.mean(axis=0)
+
+    Attributes
+    ----------
+    bands : :class:`numpy.ndarray`
+        band center frequencies in Hz, see :func:`ntixl2.message.rta_bands`
+
+    """
+
+    def __init__(self, capacity, bands):
+        """Initiate
+
+        Parameters
+        ----------
+        capacity : int
+            max number of spectra
+        bands : :class:`numpy.ndarray`
+            band center frequencies in Hz
+
+        """
+        self.bands = bands
+        super(SpectrogramBuffer, self).__init__(capacity, [('time', np.float64), ('levels', np.float32, (len(bands),))])
+        self._times = self._data['time']
+        self._levels = self._data['levels']
+
+    def append_spectrum(self, time, levels):
+        """Append a spectrum.
+
+        Parameters
+        ----------
+        time : float
+            spectrum time
+        levels : :class:`numpy.ndarray`
+            band levels
+        """
+        h = self._head
+        self._times[h] = self._times[h + self.capacity] = time
+        self._levels[h] = self._levels[h + self.capacity] = levels
+        self._head = h + 1 if h + 1 < self.capacity else 0
+        self.count += 1
+
+    @property
+    def spectrogram(self):
+        """:class:`numpy.ndarray`: (n_spectra, n_bands) view of the levels of all spectra, oldest first."""
+        return self.last()['levels']
+
+    @property
+    def times(self):
+        """:class:`numpy.ndarray`: view of the times of all spectra, oldest first."""
+        return self.last()['time']
@@ -0,0 +1,131 @@
+"""The sampler.py module implement the periodic sampling of XL2 measurement values.
+
+The sampling instants are scheduled on monotonic deadlines `t0 + k * period`, so the sampling period doesn't drift \
+by the command latency. Deadlines missed because an exchange took longer than the period are skipped and reported.
+
+Example
+-------
+>>> slmq = QUERY_MEAS_SLM_123()
+>>> slmq.set_param('LAEQ')
+>>> with xl2:
+...     for s in sample(xl2, slmq, period=1, count=60):
+...         print(s.timestamp, s.values['LAEQ']['level'], s.missed)
+
+:func:`sample_snapshots` samples all the sound level meter values and can fill a \
+:class:`ntixl2.ringbuffer.RingBuffer`.
+
+"""
+
+import time
+import math
+from collections import namedtuple
+import numpy as np
+from .message import CommandBatch, MEASURE_INITIATE, SLMSnapshot
+
+Sample = namedtuple("Sample", ['timestamp', 'deadline', 'lateness', 'missed', 'values'])
+Sample.__doc__ = """Timestamped sample yielded by :func:`sample`.
+
+Attributes
+----------
+timestamp : float
+    wall clock time (seconds since the epoch) at which the query was sent
+deadline : float
+    monotonic clock deadline of the sample
+lateness : float
+    seconds between the deadline and the instant the query was sent
+missed : int
+    number of deadlines skipped since the previous sample
+values : dict
+    parsed query answers, see :meth:`ntixl2.message.Message.parse_answers`. For :func:`sample_snapshots` a record\
+    of :attr:`ntixl2.message.SLMSnapshot.DTYPE`.
+"""
+
+
+def sample(xl2, query, period, count=None, trigger=True, wait=5):
+    """Periodically query the XL2 and yield timestamped samples.
+
+    Parameters
+    ----------
+    xl2 : :class:`ntixl2.xl2.XL2SLM`
+        device. Open the device session (see :meth:`ntixl2.xl2.XL2SLM.open`) to sample at the link rate.
+    query : :obj:`ntixl2.message.Message` object
+        query message, eg. :class:`ntixl2.message.QUERY_MEAS_SLM_123`
+    period : float
+        sampling period in seconds. If 0 the device is queried as fast as the serial link allows.
+    count : int
+        number of samples, `None` to sample forever
+    trigger : bool
+        if True the query is preceded by a :class:`ntixl2.message.MEASURE_INITIATE` in the same serial write
+    wait : float
+        see :meth:`ntixl2.xl2.XL2SLM.serial_message`
+
+    Yields
+    ------
+    :class:`ntixl2.sampler.Sample`
+
+    Note
+    ----
+    If an exchange takes longer than the period the missed deadlines are skipped (no burst to catch up) and counted\
+    in :attr:`Sample.missed`.
+
+    """
+    message = CommandBatch([MEASURE_INITIATE(), query]) if trigger else query
+    for timestamp, deadline, lateness, missed in _schedule(period, count):
+        values = xl2.serial_message(message, wait)
+        if trigger:
+            values = values[1]
+        yield Sample(timestamp, deadline, lateness, missed, values)
+
+
+def sample_snapshots(xl2, period, buffer=None, count=None, wait=5):
+    """Periodically measure all the sound level meter values and yield timestamped samples.
+
+    Parameters
+    ----------
+    xl2 : :class:`ntixl2.xl2.XL2SLM`
+        device, see :func:`sample`
+    period : float
+        sampling period in seconds, see :func:`sample`
+    buffer : :class:`ntixl2.ringbuffer.RingBuffer`
+        if given every record is appended to the buffer. Any object with an `append` method is accepted, eg. a\
+        :class:`ntixl2.columnar.ColumnWriter`.
+    count : int
+        number of samples, `None` to sample forever
+    wait : float
+        see :meth:`ntixl2.xl2.XL2SLM.serial_message`
+
+    Yields
+    ------
+    :class:`ntixl2.sampler.Sample`
+        sample whose `values` is the record returned by :meth:`ntixl2.xl2.XL2SLM.snapshot`. The record is reused\
+        by the next sample, copy it to keep it.
+
+    """
+    record = np.zeros(1, SLMSnapshot.DTYPE)
+    for timestamp, deadline, lateness, missed in _schedule(period, count):
+        values = xl2.snapshot(out=record, wait=wait)
+        if buffer is not None:
+            buffer.append(values)
+        yield Sample(timestamp, deadline, lateness, missed, values)
+
+
+def _schedule(period, count):
+    # sleep till the next deadline, yield (timestamp, deadline, lateness, missed) and skip the passed deadlines
+    t0 = time.monotonic()
+    k, missed, n = 0, 0, 0
+    while count is None or n < count:
+        deadline = t0 + k * period
+        delay = deadline - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        timestamp = time.time()
+        lateness = time.monotonic() - deadline
+        yield timestamp, deadline, lateness, missed
+        n += 1
+        # next deadline not yet passed
+        if period > 0:
+            next_k = max(k + 1, int(math.floor((time.monotonic() - t0) / period)) + 1)
+        else:
+            next_k = k + 1
+        missed = next_k - k - 1
+        k = next_k
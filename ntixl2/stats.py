@@ -0,0 +1,146 @@
+"""The stats.py module implement the instrumentation of the serial communication with the XL2 device.
+
+Every message exchanged by :meth:`ntixl2.xl2.XL2SLM.serial_message` produce a :class:`CommandRecord`. The records \
+are accumulated per message class (message `ROOT` string) by a :class:`CommandStats` object and passed to the hooks \
+registered with :meth:`ntixl2.xl2.XL2SLM.add_hook`.
+
+Example
+-------
+>>> xl2.add_hook(lambda r: r.rtt > 0.5 and print('slow command', r.key, r.rtt))
+>>> xl2.stats.snapshot()['MEAS:SLM:123? {}']['rtt']['mean']
+
+"""
+
+import bisect
+from collections import namedtuple
+
+CommandRecord = namedtuple("CommandRecord", ['key', 'write', 'ttfb', 'rtt', 'bytes_out', 'bytes_in', 'timeout',
+                                             'parse_failure', 'start'])
+CommandRecord.__doc__ = """Timings and counters of a single message exchange.
+
+Attributes
+----------
+key : str
+    message `ROOT` string, message class name if the message has no `ROOT`
+write : float
+    seconds to write the message
+ttfb : float
+    seconds from the write start to the first answer byte, `None` if there is no answer
+rtt : float
+    seconds from the write start to the end of the exchange
+bytes_out : int
+    bytes written
+bytes_in : int
+    bytes read
+timeout : bool
+    True if an expected answer line was not received
+parse_failure : bool
+    True if the answer could not be parsed
+start : float
+    :func:`time.perf_counter` time of the write start
+"""
+
+# histogram bins edges in seconds, 10 us to 100 s log spaced
+HISTOGRAM_EDGES = [10 ** (e / 4.) for e in range(-20, 9)]
+
+
+class _Timing(object):
+    # sum, min, max and histogram of a timing
+
+    def __init__(self, edges):
+        self.edges = edges
+        self.counts = [0] * (len(edges) + 1)
+        self.n, self.sum, self.min, self.max = 0, 0., None, None
+
+    def add(self, value):
+        if value is None:
+            return
+        self.n += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.counts[bisect.bisect_right(self.edges, value)] += 1
+
+    def snapshot(self):
+        return {'n': self.n, 'sum': self.sum, 'mean': self.sum / self.n if self.n else None,
+                'min': self.min, 'max': self.max}
+
+
+class _Counters(object):
+    # counters of a message class
+
+    def __init__(self, edges):
+        self.count = 0
+        self.timeouts = 0
+        self.parse_failures = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.timings = {'write': _Timing(edges), 'ttfb': _Timing(edges), 'rtt': _Timing(edges)}
+
+    def add(self, record):
+        self.count += 1
+        self.timeouts += record.timeout
+        self.parse_failures += record.parse_failure
+        self.bytes_out += record.bytes_out
+        self.bytes_in += record.bytes_in
+        for k, t in self.timings.items():
+            t.add(getattr(record, k))
+
+
+class CommandStats(object):
+    """Accumulate :class:`CommandRecord` per message class.
+
+    Attributes
+    ----------
+    edges : list
+        histogram bins edges in seconds
+
+    """
+
+    def __init__(self, edges=HISTOGRAM_EDGES):
+        self.edges = list(edges)
+        self._counters = {}
+
+    def add(self, record):
+        """Add a record."""
+        c = self._counters.get(record.key)
+        if c is None:
+            c = self._counters[record.key] = _Counters(self.edges)
+        c.add(record)
+
+    def reset(self):
+        """Clear all counters."""
+        self._counters = {}
+
+    def snapshot(self):
+        """Return the counters.
+
+        Returns
+        -------
+        dict
+            dict of message keys. Values are dict with the counters (`count`, `timeouts`, `parse_failures`,\
+            `bytes_out`, `bytes_in`) and the statistics (`n`, `sum`, `mean`, `min`, `max`) of the timings\
+            (`write`, `ttfb`, `rtt`).
+        """
+        ret = {}
+        for key, c in self._counters.items():
+            d = {'count': c.count, 'timeouts': c.timeouts, 'parse_failures': c.parse_failures,
+                 'bytes_out': c.bytes_out, 'bytes_in': c.bytes_in}
+            d.update({k: t.snapshot() for k, t in c.timings.items()})
+            ret[key] = d
+        return ret
+
+    def histograms(self):
+        """Return the timings histograms.
+
+        Returns
+        -------
+        dict
+            dict with the bins `edges` and for every message key a dict with the bins counts of the timings\
+            (`write`, `ttfb`, `rtt`). The first bin counts the values below the first edge, the last bin the\
+            values above the last edge.
+        """
+        ret = {'edges': list(self.edges)}
+        for key, c in self._counters.items():
+            ret[key] = {k: list(t.counts) for k, t in c.timings.items()}
+        return ret
@@ -75,14 +75,24 @@ Todo
 """
 
 import os
+import copy
 import time
+import asyncio
+import threading
 import subprocess
 import warnings
 import pathlib,shutil
 import serial
 from serial.tools import list_ports
+from concurrent.futures import Future
 from .message import ECHO, SYSTEM_MSDMAC,RESET, SYSTEM_KEY, QUERY_SYSTEM_ERROR, QUERY_IDN, \
-    SYSTEM_KLOCK, QUERY_INITIATE_STATE
+    SYSTEM_KLOCK, QUERY_INITIATE_STATE, SLMSnapshot
+from .stats import CommandStats, CommandRecord
+from .hotplug import wait_until
+
+# sentinel message acknowledging messages without answers
+_ACK = ECHO()
+_ACK_ANSWER = "deb" + ECHO.EOL
 
 class XL2Error(Exception):
     def __init__(self, value):
@@ -90,6 +100,67 @@ class XL2Error(Exception):
     def __str__(self):
         return repr(self.value)
 
+
+class ModeSwitch(Future):
+    """Future of a non-blocking device status switch.
+
+    See :meth:`ntixl2.xl2.XL2SLM.switch_to_mass` and :meth:`ntixl2.xl2.XL2SLM.switch_to_serial`. The object is\
+    a :class:`concurrent.futures.Future` and can be awaited in asyncio coroutines.
+
+    The switch progress is reported by the :attr:`state` attribute:
+
+        - `'pending'`: switch not started
+        - `'sent'`: switch command sent (serial message or eject)
+        - `'dropped'`: device file of the old status disappeared
+        - `'appeared'`: device file of the new status appeared
+        - `'mounted'` or `'connected'`: device is usable in the new status
+
+    Example
+    -------
+    >>> switches = [xl2.switch_to_mass() for xl2 in devices]
+    >>> for s in concurrent.futures.as_completed(switches):
+    ...     print(s.history)
+
+    Attributes
+    ----------
+    status : str
+        target device status {'SERIAL'| 'MASS'}
+    state : str
+        progress state
+    history : list
+        list of (state, time.monotonic() time) tuples
+
+    """
+
+    READY = {'MASS': 'mounted', 'SERIAL': 'connected'}
+
+    def __init__(self, status):
+        super(ModeSwitch, self).__init__()
+        self.status = status
+        self.state = 'pending'
+        self.history = [(self.state, time.monotonic())]
+        self._progress_callbacks = []
+
+    def __await__(self):
+        return asyncio.wrap_future(self).__await__()
+
+    def add_progress_callback(self, fn):
+        """Register a function called with the switch and the new state at every state change.
+
+        Note
+        ----
+        The function is called in the switch thread.
+
+        """
+        self._progress_callbacks.append(fn)
+
+    def _progress(self, state):
+        if state != self.state:
+            self.state = state
+            self.history.append((state, time.monotonic()))
+            for fn in self._progress_callbacks:
+                fn(self, state)
+
 ##func
 def safe_remove_mass_storage_device(device, mountDir):
     """Umount and eject device
@@ -122,11 +193,25 @@ class XL2SLM(object):
             device path in mass storage modus
         mountDir : str
             directory path where device is automatically mounted
+        conn : :obj:`serial.Serial`
+            serial connection to the device, `None` until the first connection is made
+        ack : str
+            acknowledgement mode of messages without answers {'echo'|'wait'}, see :meth:`serial_message`
+        stats : :class:`ntixl2.stats.CommandStats`
+            timings and counters of the message exchanges per message class, see :meth:`add_hook` too
+
+    Note
+    ----
+    By default every :meth:`serial_message` opens and closes the serial port. Use :meth:`open` and :meth:`close` or\
+    the object as context manager to keep a single connection alive for a whole session::
 
+        with XL2SLM(mountDir) as xl2:
+            for i in range(1000):
+                xl2.serial_message(QUERY_INITIATE_STATE())
 
     """
 
-    def __init__(self,mountDir,  serialDev='/dev/XL2', storageDev = '/dev/XL2-sd'):
+    def __init__(self,mountDir,  serialDev='/dev/XL2', storageDev = '/dev/XL2-sd', ack = 'echo'):
         """Initiate
 
         Parameters
@@ -134,15 +219,72 @@ class XL2SLM(object):
         serialDev : str
             XL2 device file when in serial modus
         storageDev : str
-            XL2 device file when in mass storage modus
+            XL2 device file when in mass storage modus. `None` if unknown, the device is then only usable in serial\
+            modus
         mountDir : str
             XL2 mount directory
+        ack : str
+            acknowledgement mode of messages without answers {'echo'|'wait'}, see :meth:`serial_message`
 
         """
         self.serialDev = serialDev
+        self.ack = ack
         self.storageDev = storageDev
         self.mountDir = pathlib.Path(mountDir)
+        self.conn = None
+        self._session = False
+        self.stats = CommandStats()
+        self.hooks = []
+        self._snapshot = None
         self.device_status
+        if self.conn is not None:
+            self.conn.close()
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def open(self):
+        """ Open a persistent serial session.
+
+        The serial connection is kept open across :meth:`serial_message` calls until :meth:`close` is called. If the\
+        connection breaks during a session it is reopened once before the error is raised.
+
+        Returns
+        -------
+        :class:`ntixl2.xl2.XL2SLM`
+            self
+
+        Raise :class:`ntixl2.xl2.XL2ERROR` if the device is not in SERIAL status.
+
+        """
+        if not self.is_open:
+            if self.device_status != 'SERIAL':
+                raise XL2Error('device_status has to be SERIAL')
+            self._session = True
+        return self
+
+    def close(self):
+        """ Close the serial session and the serial connection."""
+        self._session = False
+        if self.conn is not None:
+            self.conn.close()
+
+    @property
+    def is_open(self):
+        """ :obj:`bool`: True if a persistent serial session is open."""
+        return self._session and self.conn is not None and self.conn.is_open
+
+    def _connect(self):
+        # (re)open the serial connection
+        if self.conn is not None:
+            self.conn.close()
+        try:
+            self.conn = serial.Serial(self.serialDev, baudrate=9600, timeout=1)
+        except serial.SerialException:
+            raise XL2Error('Serial Error, Not able to serial connect')
 
     def _which_device(self):
         #return which device is connected
@@ -153,6 +295,8 @@ class XL2SLM(object):
         else:
             return self.serialDev
         # is mass storage device there?
+        if self.storageDev is None:
+            return None
         try:
             os.stat(self.storageDev)
         except  FileNotFoundError:
@@ -164,7 +308,7 @@ class XL2SLM(object):
         # test if connection si active
         mess = ECHO()
         try:
-            self.conn.write((mess.to_str()).encode('ascii'))
+            self.conn.write(mess.to_bytes())
         except (serial.SerialException,AttributeError) as e:
             return False
         else:
@@ -187,15 +331,14 @@ class XL2SLM(object):
         # if self._conn_active():
         #     return 'SERIAL'
         # else:
+        if self.is_open:
+            # session connection is already there
+            return 'SERIAL'
         dev = self._which_device()
         if dev == self.serialDev:
-            try :
-                self.conn = serial.Serial(self.serialDev, baudrate=9600, timeout=1)
-            except serial.SerialException:
-                raise XL2Error('Serial Error, Not able to serial connect')
-            else:
-                return 'SERIAL'
-        elif dev == self.storageDev:
+            self._connect()
+            return 'SERIAL'
+        elif dev is not None and dev == self.storageDev:
             mnt = self._mount_status()
             if mnt['mounted']:
                 return 'MASS'
@@ -232,37 +375,17 @@ class XL2SLM(object):
 
         Note
         ----
-            The function is blocking till the switch is successful. This can take many seconds.
+            The function is blocking till the switch is successful, eg. the device is mounted to :attr:`mountDir`.\
+            The device files and the mount table are watched (see :mod:`ntixl2.hotplug`), the function returns as\
+            soon as the device is usable. This can take many seconds.
 
         See Also
         --------
-        :func:`ntixl2.xl2.safe_remove_mass_storage_device`
+        :func:`ntixl2.xl2.safe_remove_mass_storage_device`, :meth:`switch_to_mass`
 
         """
-        status = self.device_status
-        if status == 'SERIAL':
-            mess = SYSTEM_MSDMAC()
-            try:
-                self.serial_message(mess)
-            except serial.SerialException:
-                print("Serial connection is broken.")
-            self.conn.close()
-            success,i = False,0
-            time.sleep(20)
-            while not success:
-                time.sleep(5)
-                try:
-                    status = self.device_status
-                except XL2Error:
-                    success = False
-                else:
-                    success = (status == 'MASS')
-                if i >20:
-                    warnings.warn("timeout", UserWarning)
-                    break
-                i += 1
-        elif status == 'MASS':
-            print("XL2 already in 'MASS' status ")
+        if not self._switch('MASS', ModeSwitch('MASS')):
+            warnings.warn("timeout", UserWarning)
 
     def to_serial(self):
         """ Switch the device into SERIAL status.
@@ -271,29 +394,114 @@ class XL2SLM(object):
 
         Note
         ----
-            The function is blocking till the switch is successful. This can take many seconds.
+            The function is blocking till the switch is successful. The device files are watched (see\
+            :mod:`ntixl2.hotplug`), the function returns as soon as the serial connection can be opened. This can take\
+            many seconds.
+
+        See Also
+        --------
+        :meth:`switch_to_serial`
 
         """
-        status = self.device_status
+        if not self._switch('SERIAL', ModeSwitch('SERIAL')):
+            warnings.warn("timeout", UserWarning)
+
+    def switch_to_mass(self):
+        """ Non-blocking :meth:`to_mass`.
+
+        Returns
+        -------
+        :class:`ntixl2.xl2.ModeSwitch`
+            future of the switch, its result is True if the switch is successful and False if timeout. Its exception\
+            is a :class:`ntixl2.xl2.XL2Error` if :attr:`storageDev` is `None`.
+
+        """
+        return self._start_switch('MASS')
+
+    def switch_to_serial(self):
+        """ Non-blocking :meth:`to_serial`.
+
+        Returns
+        -------
+        :class:`ntixl2.xl2.ModeSwitch`
+            future of the switch, its result is True if the switch is successful and False if timeout. Its exception\
+            is a :class:`ntixl2.xl2.XL2Error` if :attr:`storageDev` is `None`.
+
+        """
+        return self._start_switch('SERIAL')
+
+    def _start_switch(self, status):
+        # run switch in a thread
+        switch = ModeSwitch(status)
+
+        def run():
+            if switch.set_running_or_notify_cancel():
+                try:
+                    switch.set_result(self._switch(status, switch))
+                except BaseException as e:
+                    switch.set_exception(e)
+
+        threading.Thread(target=run, name="XL2 switch to {}".format(status), daemon=True).start()
+        return switch
+
+    def _switch(self, status, switch):
+        # switch device status, report progress to switch. Return False if timeout
+        if self.storageDev is None:
+            raise XL2Error('storageDev is unknown, the device can only be used in SERIAL status')
+        current = self.device_status
+        if current == status:
+            print("XL2 already in '{}' status ".format(status))
+            switch._progress(switch.READY[status])
+            return True
         if status == 'MASS':
+            self._mass_command()
+        else:
             safe_remove_mass_storage_device(str(self.storageDev), str(self.mountDir))
-            success,i = False,0
-            time.sleep(30)
-            while not success:
-                i+=1
-                time.sleep(5)
-                try:
-                    status = self.device_status
-                except XL2Error:
-                    success = False
-                else:
-                    success = (status == 'SERIAL')
-                if i > 20:
-                    warnings.warn("timeout", UserWarning)
-                    break
-        elif status == 'SERIAL':
-            print("XL2 already in 'SERIAL' status ")
+        switch._progress('sent')
+        return self._wait_status(status, switch)
 
+    def _mass_command(self):
+        # the device drops the serial connection, no answer to wait for
+        mess = SYSTEM_MSDMAC()
+        try:
+            if not self.is_open:
+                self._connect()
+            self.conn.write(mess.to_bytes())
+        except (serial.SerialException, XL2Error):
+            print("Serial connection is broken.")
+        # a session can't survive the switch
+        self.close()
+
+    def _status_ready(self, status):
+        # True if device is in status and usable
+        try:
+            ready = self.device_status == status
+        except XL2Error:
+            return False
+        if ready and status == 'MASS':
+            ready = os.path.ismount(str(self.mountDir))
+        if not self._session and self.conn is not None:
+            self.conn.close()
+        return ready
+
+    def _wait_status(self, status, switch, timeout=120):
+        # wait device status change looking at device files and mount table events
+        old_dev, new_dev = (self.serialDev, self.storageDev) if status == 'MASS' else (self.storageDev, self.serialDev)
+
+        def ready():
+            if switch.state == 'sent' and (old_dev is None or not os.path.exists(old_dev)):
+                switch._progress('dropped')
+            if switch.state in ('sent', 'dropped') and new_dev is not None and os.path.exists(new_dev):
+                switch._progress('appeared')
+            if self._status_ready(status):
+                switch._progress(switch.READY[status])
+                return True
+            return False
+
+        dirs = {os.path.dirname(self.serialDev), self.mountDir.parent, self.mountDir}
+        if self.storageDev is not None:
+            dirs.add(os.path.dirname(self.storageDev))
+        return wait_until(ready, dirs, timeout)
 
     def memory_usage(self):
         """memeory usage on the XL2 sd-card
@@ -357,52 +565,185 @@ class XL2SLM(object):
         else:
             raise XL2Error('device_status has to be MASS.')
 
-    def serial_message(self, message, wait = 5):
+    def serial_message(self, message, wait = 5, ack = None):
         """
 
         Parameters
         ----------
         message : :obj:`ntixl2.message.Message` object
+            message or :obj:`ntixl2.message.CommandBatch` of messages sent in a single write
         wait : float
-            Connection timeout to wait for serial line read in case of message without expected answers.
+            Connection timeout to wait for serial line read.
+        ack : str
+            acknowledgement mode of messages without answers {'echo'|'wait'}, default :attr:`ack`
 
         Returns
         -------
         dict
             parsed message answers according to message object if message has answers. else **None**
-            See :meth:`ntixl2.message.Message.parse_answers`
+            See :meth:`ntixl2.message.Message.parse_answers`. For a batch the list of parsed answers, see\
+            :meth:`ntixl2.message.CommandBatch.parse_answers`
 
         Note
         ----
         for messages with answers the connection read timeout is set to 5 seconds.
 
-        """
+        Messages without answers are acknowledged according to the `ack` mode:
 
+            - `'echo'`: an :class:`ntixl2.message.ECHO` message is sent in the same write. Its answer proves that the\
+              message produced no answer, the message completes in a single round trip.
+            - `'wait'`: the serial line is read for 0.1 seconds, the message completes after 0.1 seconds.
+
+        If a session is open (see :meth:`open`) the connection is not closed after the message. A broken connection is\
+        reopened and the message sent again once.
+
+        """
+        ack = self.ack if ack is None else ack
         if self.device_status == 'SERIAL':
-            # write message
-            self.conn.write((message.to_str()).encode('ascii'))
+            try:
+                try:
+                    ret = self._exchange(message, wait, ack)
+                except serial.SerialException:
+                    if not self._session:
+                        raise
+                    # reconnect and retry once
+                    self._connect()
+                    ret = self._exchange(message, wait, ack)
+            finally:
+                if not self._session:
+                    self.conn.close()
+            return ret
+        else:
+            raise XL2Error('device_status has to be SERIAL')
+
+    def _exchange(self, message, wait, ack):
+        t0 = time.perf_counter()
+        ttfb, bytes_in, timeout, parse_failure = None, 0, False, False
+        sentinel = message.RETURN is None and ack == 'echo'
+        # write message
+        out = message.to_bytes() + (_ACK.to_bytes() if sentinel else b"")
+        # drop late answers of previous messages, else the answers are shifted
+        self.conn.reset_input_buffer()
+        self.conn.write(out)
+        t_write = time.perf_counter() - t0
+        try:
             # read returmn lines
-            if message.RETURN is not None:
+            if message.RETURN is not None or sentinel:
                 self.conn._timeout = wait
                 ret = []
-                for i in range(message.return_lines()):
-                    line = self.conn.readline().decode('ascii')
+                for i in range(message.return_lines() if not sentinel else 1):
+                    if i == 0:
+                        # first byte apart to measure the time to first byte
+                        line = self.conn.read(1)
+                        ttfb = time.perf_counter() - t0
+                        if line:
+                            line += self.conn.readline()
+                    else:
+                        line = self.conn.readline()
+                    bytes_in += len(line)
+                    line = line.decode('ascii')
+                    timeout = line == ""
                     assert not line == ""
                     ret.append(line)
+                if sentinel:
+                    if not ret[0] == _ACK_ANSWER:
+                        # read the sentinel answer too, keep the line in sync
+                        bytes_in += len(self.conn.readline())
+                        self.conn._timeout = 1
+                        raise ValueError('message expect no return,answer is {}.'.format(ret[0]))
+                    ret = None
+                else:
+                    try:
+                        ret = message.parse_answers(ret)
+                    except Exception:
+                        parse_failure = True
+                        raise
                 self.conn._timeout = 1
-                ret = message.parse_answers(ret)
             else:
                 # if message has no return raise error if there is a return
                 self.conn._timeout = 0.1
-                line = self.conn.readline().decode('ascii')
+                line = self.conn.readline()
                 self.conn._timeout = 1
+                bytes_in += len(line)
+                line = line.decode('ascii')
                 if not line == "":
                     raise ValueError('message expect no return,answer is {}.'.format(line))
                 ret = None
-            self.conn.close()
-            return ret
-        else:
-            raise XL2Error('device_status has to be SERIAL')
+        finally:
+            self._record(message, t_write, ttfb, time.perf_counter() - t0, len(out), bytes_in, timeout,
+                         parse_failure, t0)
+        return ret
+
+    def _record(self, message, write, ttfb, rtt, bytes_out, bytes_in, timeout, parse_failure, start):
+        # update stats and call hooks
+        record = CommandRecord(getattr(message, 'ROOT', type(message).__name__), write, ttfb, rtt, bytes_out,
+                               bytes_in, timeout, parse_failure, start)
+        self.stats.add(record)
+        for hook in self.hooks:
+            hook(record)
+
+    def add_hook(self, hook):
+        """ Register a function called after every message exchange.
+
+        Parameters
+        ----------
+        hook : callable
+            function called with the :class:`ntixl2.stats.CommandRecord` of the exchange
+
+        """
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        """ Unregister a function registered with :meth:`add_hook`."""
+        self.hooks.remove(hook)
+
+    def snapshot(self, out=None, row=0, wait=5):
+        """ Measure and return all the sound level meter values.
+
+        A :class:`ntixl2.message.MEASURE_INITIATE` and the query of all the `STATISTICS` values are sent in a single\
+        write, see :class:`ntixl2.message.SLMSnapshot`.
+
+        Parameters
+        ----------
+        out : :class:`numpy.ndarray`
+            1D array of :attr:`ntixl2.message.SLMSnapshot.DTYPE` where the values are written. If `None` a new record\
+            is returned.
+        row : int
+            index of the record in `out`
+        wait : float
+            see :meth:`serial_message`
+
+        Returns
+        -------
+        :class:`numpy.void`
+            record of :attr:`ntixl2.message.SLMSnapshot.DTYPE`, a view on `out[row]` if `out` is given. The `time`\
+            field is the wall clock time at which the query was sent.
+
+        Example
+        -------
+        >>> table = np.zeros(60, dtype=SLMSnapshot.DTYPE)
+        >>> with xl2:
+        ...     for i in range(60):
+        ...         xl2.snapshot(out=table, row=i)
+        >>> table['LAEQ'].mean()
+
+        """
+        batch = self._snapshot_batch(out, row)
+        t = time.time()
+        rec = self.serial_message(batch, wait)
+        rec['time'] = t
+        return rec
+
+    def _snapshot_batch(self, out, row):
+        # the messages are reused, their serial string is encoded once. The batch is a shallow copy per call, so
+        # concurrent snapshots don't overwrite each other's target
+        if self._snapshot is None:
+            self._snapshot = SLMSnapshot()
+        if out is not None and out.dtype != SLMSnapshot.DTYPE:
+            raise ValueError('out dtype has to be SLMSnapshot.DTYPE')
+        batch = copy.copy(self._snapshot)
+        batch.out, batch.row = out, row
+        return batch
 
     def select_profile(self, profile=5):
         """ Reset device and load the wanted profile
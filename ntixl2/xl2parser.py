@@ -5,72 +5,478 @@ The NTiXL2 device save report and logging files in .txt format.
 
 """
 
+import os
+import re
+import time
+import mmap
+import locale
+import pathlib
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
 
-def __parse_file(file_path, function_dict):
-    # Split up data into sections
-    raw_sections = open(file_path).read().split('#')
+ENCODING = locale.getpreferredencoding(False)
 
-    sections = {}
-    first_line = raw_sections.pop(0).split('\n')[0].split('\t')
-    sections['Title'] = first_line[0][:-1]
-    sections['Measurement'] = {'file':((first_line[2]).split("\\")[1]).strip()}
+def index_sections(file_path):
+    """Index the sections of a logging or report file.
+
+    The file is memory-mapped and scanned once for the section title lines (lines starting with '#'), the sections\
+    content is not read.
+
+    Parameters
+    ----------
+    file_path
+        The location of the file
+
+    Returns
+    -------
+    dict
+        (start, end) byte offsets of the sections keyed by title, in file order. `start` is the offset after the '#'\
+        of the title line, `end` the offset of the next title line or the file size. The title line of the file is\
+        keyed by 'Title'.
+
+    Example
+    -------
+    >>> index = index_sections(path)
+    >>> list(index)
+    ['Title', 'Hardware Configuration', 'Measurement Setup', 'Time', 'Broadband LOG Results', ...]
 
-    for section in raw_sections:
-        # Split up sections into lines to parse
-        lines = [line for line in section.split('\n\t')]
-        section_title = lines.pop(0).strip()
-        sections[section_title] = lines
+    """
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return __index_sections(mm)
+
+def __index_sections(mm, titles=None):
+    # with titles, stop the scan once these sections are indexed
+    index = {}
+    title, start = 'Title', 0
+    pos = mm.find(b'\n#')
+    while pos >= 0:
+        index[title] = (start, pos + 1)
+        if titles is not None and titles.issubset(index):
+            return index
+        start = pos + 2
+        eol = mm.find(b'\n', start)
+        title = __decode(mm[start:eol if eol >= 0 else len(mm)]).strip()
+        pos = mm.find(b'\n#', start)
+    index[title] = (start, len(mm))
+    return index
+
+def __decode(raw):
+    # decode as a text mode file
+    text = raw.decode(ENCODING)
+    return text.replace('\r\n', '\n') if '\r' in text else text
+
+def __parse_file(file_path, function_dict, text_sections=(), titles=None):
+    # Index the sections of the memory-mapped file, decode only the selected ones
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        index = __index_sections(mm, None if titles is None else set(titles) | {'Title', 'Time'})
+        start, end = index.pop('Title')
+        sections = __parse_title(__decode(mm[start:end]).split('\n')[0])
+
+        for section_title, (start, end) in index.items():
+            if titles is not None and section_title not in titles and section_title != 'Time':
+                continue
+            section = __decode(mm[start:end])
+            if text_sections(section_title) if callable(text_sections) else section_title in text_sections:
+                # the section function parses the text itself
+                sections[section_title] = section
+                continue
+            # Split up sections into lines to parse
+            lines = [line for line in section.split('\n\t')]
+            lines.pop(0)
+            sections[section_title] = lines
 
     for key,function in function_dict.items():
-        sections[key] = function(sections[key])
+        if key in sections:
+            sections[key] = function(sections[key])
     sections['Measurement'].update(sections.pop('Time'))
 
     return sections
 
-def parse_broadband_file(file_path,options={}):
+def __parse_title(line):
+    first_line = line.split('\t')
+    sections = {}
+    sections['Title'] = first_line[0][:-1]
+    sections['Measurement'] = {'file':((first_line[2]).split("\\")[1]).strip()}
+    return sections
+
+def parse_broadband_file(file_path,options={}, columnar=False, sections=None):
     """
 
     Parameters
     ----------
     file_path
         The location of the broadband recording file to be parsed
+    columnar : bool
+        if True the LOG results are parsed column-wise into NumPy arrays, see Note
+    sections : list
+        titles of the sections to parse, all sections if `None`. The other sections are not read, eg.\
+        `sections=['Measurement Setup']` reads the metadata of a huge log without loading the LOG results. The\
+        'Title' and 'Measurement' sections are always parsed. See :func:`index_sections`.
 
     Returns
     -------
     dict
         A dictionary organized in sections containing metadata and a section for measurements
 
+    Note
+    ----
+    By default the 'Broadband LOG Results' samples are a dict keyed by the row `datetime`, rows with the same\
+    timestamp overwrite each other. In columnar mode every row is kept and the section is a dict with:
+
+        - `timestamps`: `datetime64[ms]` array of the rows
+        - `samples`: (headers, dict of column arrays keyed by header). The dtype of a column is given by its unit:\
+          float64 for levels and numbers (blank cells are NaN), int64 for '[INT]' columns without blank cells,\
+          strings for '[TXT]' and the Pause column, `timedelta64[ms]` for '[hh:mm:ss]' durations.
+        - `events`: as in the default mode
+
+    The columnar mode is much faster on large logs and uses a fraction of the memory.
+
     """
     broadband_section_functions = {"Hardware Configuration": __parse_hardware_section,
                                    "Measurement Setup": __parse_measurement_setup_section,
                                    "Time": __parse_time_section,
-                                   "Broadband LOG Results": __parse_broadband_data_section,
+                                   "Broadband LOG Results": __parse_broadband_data_columns if columnar else
+                                                            __parse_broadband_data_section,
     }
 
-    return __parse_file(file_path, broadband_section_functions)
-
-
-# def parse_spectrum_file(file_path):
-#     """
-#
-#     Parameters
-#     ----------
-#     file_path
-#         The location of the broadband recording file to be parsed
-#
-#     Returns
-#     -------
-#     dict
-#         A dictionary organized in sections containing metadata and a section for measurements
-#
-#     """
-#     spectrum_section_functions = { "Hardware Configuration": __parse_hardware_section,
-#                                    "Measurement Setup": __parse_measurement_setup_section,
-#                                    "Time": __parse_time_section,
-#                                    "sPECTRUM LOG Results": __parse_broadband_data_section,
-#     }
-#     return __parse_file(file_path, spectrum_section_functions)
+    return __parse_file(file_path, broadband_section_functions,
+                        text_sections=["Broadband LOG Results"] if columnar else [], titles=sections)
+
+
+def iter_broadband_file(file_path, chunk_rows=10000):
+    """Iterate over a broadband logging file without loading it in memory.
+
+    The file is read line by line. The metadata sections are yielded first, then the rows of the LOG results section\
+    in chunks of at most `chunk_rows` rows, so the memory use doesn't depend on the file size.
+
+    Parameters
+    ----------
+    file_path
+        The location of the broadband recording file to be parsed
+    chunk_rows : int
+        max number of rows per chunk
+
+    Yields
+    ------
+    dict
+        First the metadata: the sections preceding the LOG results as in :func:`parse_broadband_file` and the\
+        'Broadband LOG Results' section with the `samples` and `events` headers only. Then the chunks: dict with\
+        the `timestamps` list, the `samples` list of values lists (every row is kept, also rows with the same\
+        timestamp) and the `events` dict of the chunk.
+
+    Note
+    ----
+    The sections following the LOG results (eg. results over whole log period) are not read.
+
+    Example
+    -------
+    >>> chunks = iter_broadband_file(path)
+    >>> meta = next(chunks)
+    >>> for chunk in chunks:
+    ...     aggregate(chunk['timestamps'], chunk['samples'])
+
+    """
+    broadband_section_functions = {"Hardware Configuration": __parse_hardware_section,
+                                   "Measurement Setup": __parse_measurement_setup_section,
+                                   "Time": __parse_time_section,
+    }
+    data_title = "Broadband LOG Results"
+    with open(file_path) as f:
+        sections = __parse_title(f.readline())
+        # metadata sections, till the data section title
+        title, lines = None, []
+        for line in f:
+            if line.startswith('#'):
+                if title is not None:
+                    sections[title] = lines
+                title, lines = line[1:].strip(), []
+                if title == data_title:
+                    break
+            elif line.startswith('\t'):
+                lines.append(line[1:].rstrip('\n'))
+        else:
+            raise ValueError("no '{}' section in {}".format(data_title, file_path))
+        for key, function in broadband_section_functions.items():
+            sections[key] = function(sections[key])
+        sections['Measurement'].update(sections.pop('Time'))
+
+        layout = __parse_data_header(f.readline()[1:].rstrip('\n'), f.readline()[1:].rstrip('\n'))
+        sections[data_title] = {"samples": layout['samples_headers'], "events": layout['events_headers']}
+        yield sections
+
+        chunk = {'timestamps': [], 'samples': [], 'events': {}}
+        for line in f:
+            if not line.startswith('\t'):
+                # end of the data section
+                break
+            timestamp, values, event = __parse_data_row(line[1:].rstrip('\n'), layout)
+            chunk['timestamps'].append(timestamp)
+            chunk['samples'].append(values)
+            if event is not None:
+                chunk['events'][event[0]] = event[1]
+            if len(chunk['timestamps']) >= chunk_rows:
+                yield chunk
+                chunk = {'timestamps': [], 'samples': [], 'events': {}}
+        if chunk['timestamps']:
+            yield chunk
+
+
+def follow_broadband_file(file_path, interval=None, timeout=None, chunk_bytes=2 ** 26):
+    """Follow a broadband logging file which is still written by the XL2.
+
+    The byte offset of the last parsed row and the columns of the LOG results are kept between the iterations, every\
+    iteration parses only the complete rows appended since the previous one.
+
+    Parameters
+    ----------
+    file_path
+        The location of the broadband recording file to be followed
+    interval : float
+        if `None` every iteration returns at once, `None` if there is nothing new. Else the file is polled every\
+        `interval` seconds till there are new rows.
+    timeout : float
+        with `interval`, max seconds without new rows, then the iteration stops. `None` to wait forever.
+    chunk_bytes : int
+        max number of bytes parsed per iteration, bounds the memory use when following a large file
+
+    Yields
+    ------
+    dict
+        First the metadata as in :func:`iter_broadband_file`. Then the new rows, a dict as the 'Broadband LOG Results'\
+        section of :func:`parse_broadband_file` in columnar mode, with the `offset` of the file after the rows. The\
+        iteration stops when the XL2 closed the LOG results section (end of the measurement) or after `timeout`.
+
+    Example
+    -------
+    >>> rows = follow_broadband_file(path)
+    >>> meta = next(rows)
+    >>> while True:
+    ...     new = next(rows)        # every minute
+    ...     if new is not None:
+    ...         dashboard.update(new['timestamps'], new['samples'][1]['LAeq_dt[dB]'])
+
+    """
+    data_title = "Broadband LOG Results"
+    last = time.monotonic()
+
+    def wait():
+        # False if nothing new for timeout seconds
+        if timeout is not None and time.monotonic() - last >= timeout:
+            return False
+        time.sleep(interval)
+        return True
+
+    while True:
+        found = __follow_header(file_path, data_title)
+        if found is not None:
+            break
+        if interval is None:
+            yield None
+        elif not wait():
+            return
+    header, offset = found
+    lines = header.split('\n')
+    layout = __parse_data_header(lines[1].lstrip('\t'), lines[2].lstrip('\t'))
+    sections = parse_broadband_file(file_path, sections=["Hardware Configuration", "Measurement Setup"])
+    sections[data_title] = {"samples": layout['samples_headers'], "events": layout['events_headers']}
+    yield sections
+
+    while True:
+        with open(file_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < offset:
+                raise ValueError('{} was truncated'.format(file_path))
+            f.seek(offset)
+            block = f.read(min(size - offset, chunk_bytes))
+        # complete lines only, the LOG results end at the first line without leading tab
+        block = block[:block.rfind(b'\n') + 1]
+        end = re.search(b'^[^\t]', block, re.MULTILINE)
+        rows = block if end is None else block[:end.start()]
+        if rows:
+            offset += len(rows)
+            last = time.monotonic()
+            chunk = __parse_broadband_data_columns(header + __decode(rows))
+            chunk['offset'] = offset
+            yield chunk
+        if end is not None:
+            return
+        if not rows:
+            if interval is None:
+                yield None
+            elif not wait():
+                return
+
+def __follow_header(file_path, data_title):
+    # (title, column names and units lines, offset of the first row) of the LOG results, None if not written yet
+    if os.path.getsize(file_path) == 0:
+        return None
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        index = __index_sections(mm, {'Title', 'Time', data_title})
+        if data_title not in index or 'Time' not in index:
+            return None
+        start = index[data_title][0]
+        end = start
+        for i in range(3):
+            end = mm.find(b'\n', end) + 1
+            if end == 0:
+                return None
+        return __decode(mm[start:end]), end
+
+def parse_spectrum_file(file_path, options={}, sections=None):
+    """
+
+    Parameters
+    ----------
+    file_path
+        The location of the RTA spectrum recording file to be parsed
+    sections : list
+        titles of the sections to parse, all sections if `None`, see :func:`parse_broadband_file`
+
+    Returns
+    -------
+    dict
+        A dictionary organized in sections containing metadata and a section for measurements. The\
+        'RTA LOG Results ...' sections (eg. 'RTA LOG Results LZeq_dt') are dict with:
+
+            - `timestamps`: `datetime64[ms]` array of the rows
+            - `bands`: float32 array of the band center frequencies in Hz
+            - `levels`: (n_rows, n_bands) float32 array of the band levels, blank cells are NaN
+
+    Example
+    -------
+    >>> spectrum = parse_spectrum_file(path)['RTA LOG Results LZeq_dt']
+    >>> spectrum['levels'][:, spectrum['bands'] == 1000]
+
+    """
+    spectrum_section_functions = {"Hardware Configuration": __parse_hardware_section,
+                                  "Measurement Setup": __parse_measurement_setup_section,
+                                  "Time": __parse_time_section,
+    }
+    def is_data_section(title):
+        return title.startswith("RTA LOG Results") and not title.endswith("log period")
+
+    parsed = __parse_file(file_path, spectrum_section_functions, text_sections=is_data_section, titles=sections)
+    for title in [t for t in parsed if is_data_section(t)]:
+        parsed[title] = __parse_spectrum_data_section(parsed[title])
+    return parsed
+
+def iter_parse_directory(path, pattern='*_Log.txt', workers=None):
+    """Parse the log files of a directory in parallel, yield the results as they are ready.
+
+    Broadband logs are parsed by :func:`parse_broadband_file` in columnar mode, RTA logs (files with '_RTA_' in\
+    the name) by :func:`parse_spectrum_file`.
+
+    Parameters
+    ----------
+    path : str
+        directory path
+    pattern : str
+        glob pattern of the log files
+    workers : int
+        number of worker processes, default the number of processors. If 1 the files are parsed in this process.
+
+    Yields
+    ------
+    tuple
+        (file path, parsed sections) in the order the files are parsed
+
+    """
+    files = sorted(str(p) for p in pathlib.Path(path).glob(pattern) if p.is_file())
+    if workers == 1:
+        for f in files:
+            yield f, __parse_log(f)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(__parse_log, f): f for f in files}
+        try:
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            # generator closed early or parse error
+            for future in futures:
+                future.cancel()
+
+def parse_directory(path, pattern='*_123_Log.txt', workers=None):
+    """Parse the log files of a directory in parallel and merge them into one time-ordered dataset.
+
+    Parameters
+    ----------
+    path : str
+        directory path
+    pattern : str
+        glob pattern of the log files. The data sections with the same title are merged, so the pattern should\
+        select logs of one kind, eg. '*_123_Log.txt' or '*_RTA_3rd_Log.txt'.
+    workers : int
+        number of worker processes, see :func:`iter_parse_directory`
+
+    Returns
+    -------
+    dict
+        `files`: list of the metadata sections of each file, in measurement start order, with the file `path` and\
+        the `events` of the data sections. For every data section title (eg. 'Broadband LOG Results') the merged\
+        section, see the columnar mode of :func:`parse_broadband_file` and :func:`parse_spectrum_file`. The rows are\
+        sorted by timestamp. Broadband columns missing in some files are filled with NaN (or '' for strings).
+
+    Example
+    -------
+    >>> data = parse_directory('/media/XL2-sd/Projects/RBL', workers=4)
+    >>> levels = data['Broadband LOG Results']
+    >>> levels['timestamps'], levels['samples'][1]['LAeq_dt[dB]']
+
+    """
+    parsed = list(iter_parse_directory(path, pattern, workers))
+    parsed.sort(key=lambda ps: (ps[1]['Measurement'].get('Start') or datetime.min, ps[0]))
+    files, data = [], {}
+    for file_path, sections in parsed:
+        meta = {'path': file_path}
+        for title, section in sections.items():
+            if isinstance(section, dict) and 'timestamps' in section:
+                data.setdefault(title, []).append(section)
+                if 'events' in section:
+                    meta[title] = {'events': section['events']}
+            else:
+                meta[title] = section
+        files.append(meta)
+    merged = {'files': files}
+    for title, parts in data.items():
+        merged[title] = __merge_data_sections(parts)
+    return merged
+
+def __parse_log(file_path):
+    # parse a log file according to its kind, run in the worker processes
+    if '_RTA_' in pathlib.Path(file_path).name:
+        return parse_spectrum_file(file_path)
+    return parse_broadband_file(file_path, columnar=True)
+
+def __merge_data_sections(parts):
+    # concatenate the data sections of many files, sorted by timestamp
+    timestamps = np.concatenate([p['timestamps'] for p in parts])
+    order = np.argsort(timestamps, kind='stable')
+    merged = {'timestamps': timestamps[order]}
+    if 'levels' in parts[0]:
+        bands = parts[0]['bands']
+        if any(not np.array_equal(p['bands'], bands) for p in parts):
+            raise ValueError('the spectra have different bands')
+        merged['bands'] = bands
+        merged['levels'] = np.concatenate([p['levels'] for p in parts])[order]
+        return merged
+    headers = []
+    for p in parts:
+        headers += [h for h in p['samples'][0] if h not in headers]
+    columns = {}
+    for h in headers:
+        ref = next(p['samples'][1][h] for p in parts if h in p['samples'][1])
+        chunks = []
+        for p in parts:
+            col = p['samples'][1].get(h)
+            if col is None:
+                n = len(p['timestamps'])
+                col = np.full(n, '', ref.dtype) if ref.dtype.kind in 'US' else np.full(n, np.nan)
+            chunks.append(col)
+        columns[h] = np.concatenate(chunks)[order]
+    merged['samples'] = (headers, columns)
+    return merged
 
 def __parse_hardware_section(section_lines):
     splitted_lines = [l.split('\t') for l in section_lines if l  is not ""]
@@ -112,10 +518,11 @@ def __try_parse_cell_content(s):
             except :
                 return s
 
-def __parse_broadband_data_section(section_lines):
-    colnames = __line_to_row_list(section_lines.pop(0))
+def __parse_data_header(colnames_line, units_line):
+    # column layout of a LOG results section from its two header lines
+    colnames = __line_to_row_list(colnames_line)
     num_cols= len(colnames)
-    units = __line_to_row_list(section_lines.pop(0))
+    units = __line_to_row_list(units_line)
     if 'Pause' in colnames:
         units[colnames.index('Pause')] = "[?]" # to correct the missing PAUSE unit
 
@@ -123,64 +530,173 @@ def __parse_broadband_data_section(section_lines):
 
     headers = ["{}{}".format(c,u) for c,u in zip(colnames, units)]
 
-    #samples
-    samples = {}
     samples_header_index = list(range(len(headers)))
 
-    date_index = headers.index('Date[YYYY-MM-DD]')
-    time_index = headers.index('Time[hh:mm:ss]')
-
     #events handling
     ev_header_index = {h:headers.index(h) for h in ['Evt_No[INT]','Evt_Duration[Sec]','Evt_WaveFile[TXT]'] if h in headers}
-    event = len(ev_header_index)!=0
-    #remove events columns from output
-    events_headers =['Evt_Duration[Sec]', 'Evt_WaveFile[TXT]']
-    events = {}
 
     #samples headers
     for k in ['Date[YYYY-MM-DD]','Time[hh:mm:ss]','Timer[hh:mm:ss]','Evt_Duration[Sec]','Evt_WaveFile[TXT]']:
-        samples_header_index.remove(headers.index(k))
+        if k in headers:
+            samples_header_index.remove(headers.index(k))
+
+    return {'headers': headers,
+            'units': units,
+            'samples_header_index': samples_header_index,
+            'samples_headers': [headers[i] for i in samples_header_index],
+            'date_index': headers.index('Date[YYYY-MM-DD]'),
+            'time_index': headers.index('Time[hh:mm:ss]'),
+            'ev_header_index': ev_header_index,
+            #remove events columns from output
+            'events_headers': ['Evt_Duration[Sec]', 'Evt_WaveFile[TXT]'],
+            }
+
+def __parse_data_row(line, layout):
+    # (timestamp, samples values, event or None) of a LOG results line
+    elements = __line_to_row_list(line)
+
+    #compute timestamp
+    date = datetime.strptime(elements[layout['date_index']], '%Y-%m-%d').date()
+    time = datetime.strptime(elements[layout['time_index']], '%H:%M:%S').time()
+    timestamp = datetime.combine(date,time)
+
+    values = [elements[i] for i in layout['samples_header_index']]
+
+    #events
+    ev_header_index = layout['ev_header_index']
+    event = None
+    wav_path = elements[ev_header_index['Evt_WaveFile[TXT]']] if ev_header_index else None
+    if wav_path is not None:
+        event = (elements[ev_header_index['Evt_No[INT]']],
+                 [elements[ev_header_index['Evt_Duration[Sec]']], wav_path])
+    return timestamp, values, event
+
+def __parse_broadband_data_section(section_lines):
+    layout = __parse_data_header(section_lines.pop(0), section_lines.pop(0))
+
+    #samples
+    samples = {}
+    events = {}
     ##
     for line in section_lines:
-        elements = __line_to_row_list(line)
+        timestamp, values, event = __parse_data_row(line, layout)
+        samples[timestamp] = values
+        if event is not None:
+            events[event[0]] = event[1]
+
+    return {"samples":(layout['samples_headers'],samples),
+            "events":(layout['events_headers'], events)
+            }
 
-        #compute timestamp
-        date = datetime.strptime(elements[date_index], '%Y-%m-%d').date()
-        time = datetime.strptime(elements[time_index], '%H:%M:%S').time()
-        timestamp = datetime.combine(date,time)
+def __column_cells(text, start, num_cols):
+    # one string array per column of the LOG results lines, text[start:] are the lines
+    end = len(text)
+    while end > start and text[end - 1] == '\n':
+        end -= 1
+    if text[start:end].strip() == '':
+        return [np.zeros(0, 'S1') for i in range(num_cols)]
+    try:
+        raw = text.encode('ascii')
+    except UnicodeEncodeError:
+        raw = None
+    if raw is not None and end < len(raw):
+        # fixed width lines, as written by the XL2: the columns are strided views on the text bytes
+        width = raw.index(b'\n', start) - start + 1
+        n = (end + 1 - start) // width
+        if n * width == end + 1 - start and raw.count(b'\n', start, end + 1) == n:
+            buf = np.frombuffer(raw, np.uint8, n * width, start).reshape(n, width)
+            tabs = np.flatnonzero(buf[0] == 9)
+            starts, ends = list(tabs + 1), list(tabs[1:]) + [width - 1]
+            if (len(tabs) == num_cols and tabs[0] == 0 and (buf[:, tabs] == 9).all()
+                    and all(a < b for a, b in zip(starts, ends))):
+                return [np.ndarray((n,), 'S{}'.format(b - a), raw, start + a, (width,))
+                        for a, b in zip(starts, ends)]
+    # all cells in one list, column i is every num_cols-th cell from i
+    lines = [l[1:] for l in text[start:end].split('\n') if l.strip()]
+    cells = "\t".join(lines).split('\t')
+    if len(cells) != len(lines) * num_cols:
+        raise ValueError('LOG results rows have not {} columns'.format(num_cols))
+    return [np.array(cells[i::num_cols], dtype=str) for i in range(num_cols)]
+
+def __parse_durations(values):
+    # '[hh:mm:ss]' cells to timedelta64, the hours may exceed 24
+    values = np.char.strip(values.astype(str))
+    hm, _, sec = np.char.rpartition(values, ':').T
+    h, _, m = np.char.rpartition(hm, ':').T
+    h = np.where(h == '', '0', h)
+    ms = (h.astype(np.float64) * 3600 + m.astype(np.float64) * 60 + sec.astype(np.float64)) * 1000
+    return ms.round().astype('timedelta64[ms]')
+
+def __float_column(values, dtype=np.float64):
+    try:
+        return values.astype(dtype)
+    except ValueError:
+        # blank cells
+        blank = np.char.str_len(np.char.strip(values)) == 0
+        return np.where(blank, values.dtype.type('nan'), values).astype(dtype)
+
+def __timestamps(dates, times):
+    # datetime64 of the Date and Time columns
+    dates = np.char.strip(dates)
+    times = np.char.strip(times)
+    return np.char.add(np.char.add(dates, dates.dtype.type('T')), times).astype('datetime64[ms]')
+
+def __column_to_array(values, unit):
+    # numpy array of a LOG results column, the dtype is given by the unit
+    if unit == '[hh:mm:ss]':
+        return __parse_durations(values)
+    if unit in ('[TXT]', '[?]'):
+        return np.char.strip(values).astype(str)
+    col = __float_column(values)
+    if unit == '[INT]' and not np.isnan(col).any():
+        col = col.astype(np.int64)
+    return col
+
+def __split_header(section):
+    # title, column names and units lines without leading tab, offset of the rows
+    lines, start = [], 0
+    for i in range(3):
+        end = section.index('\n', start)
+        lines.append(section[start:end].lstrip('\t'))
+        start = end + 1
+    return lines, start
+
+def __parse_broadband_data_columns(section):
+    lines, start = __split_header(section)
+    layout = __parse_data_header(lines[1], lines[2])
+    headers = layout['headers']
+    columns = __column_cells(section, start, len(headers))
+
+    #compute timestamps
+    timestamps = __timestamps(columns[layout['date_index']], columns[layout['time_index']])
+
+    samples = {headers[i]: __column_to_array(columns[i], layout['units'][i])
+               for i in layout['samples_header_index']}
+
+    #events
+    events = {}
+    ev_header_index = layout['ev_header_index']
+    if ev_header_index:
+        ev = {h: __column_to_array(columns[i], layout['units'][i]) for h, i in ev_header_index.items()}
+        for i in np.flatnonzero(ev['Evt_WaveFile[TXT]'] != ''):
+            events[int(ev['Evt_No[INT]'][i])] = [ev['Evt_Duration[Sec]'][i].item(),
+                                                 ev['Evt_WaveFile[TXT]'][i].item()]
+
+    return {"timestamps": timestamps,
+            "samples":(layout['samples_headers'], samples),
+            "events":(layout['events_headers'], events)
+            }
 
-        samples[timestamp] = [elements[i] for i in samples_header_index ]
+def __parse_spectrum_data_section(section):
+    lines, start = __split_header(section)
+    colnames = [c.strip() for c in lines[1].split('\t')]
+    band_index = colnames.index('Band [Hz]')
+    bands = np.array(colnames[band_index + 1:], dtype=np.float32)
+    columns = __column_cells(section, start, len(colnames))
 
-        #events
-        wav_path = elements[ev_header_index['Evt_WaveFile[TXT]']]
-        if event  and (wav_path is not None):
-            event_n =  elements[ev_header_index['Evt_No[INT]']]
-            event_duration = elements[ev_header_index['Evt_Duration[Sec]']]
-            events[event_n] = [event_duration, wav_path]
+    timestamps = __timestamps(columns[colnames.index('Date')], columns[colnames.index('Time')])
+    levels = np.empty((len(timestamps), len(bands)), dtype=np.float32)
+    for j, col in enumerate(columns[band_index + 1:]):
+        levels[:, j] = __float_column(col, np.float32)
 
-    return {"samples":([headers[i] for i in  samples_header_index],samples),
-            "events":(events_headers, events)
-            }
-#
-#
-# def __parse_spectrum_data_section(section):
-#     section[1] = section[1].replace('[dB]', 'Hz [dB]')
-#     samples = __parse_broadband_data_section(section)
-#     for sample in samples:
-#         sample.pop('Band [Hz]',None)
-#     for sample in samples:
-#         freq_vs_label = {}
-#         for key in sample.keys():
-#             if '[dB]'  in key:
-#                 freq_vs_label[__try_parse_cell_content(key.split()[0])] = key
-#         sample['Spectrum_Frequencies [Hz]'] = []
-#         sample['Spectrum_LZeq_dt_f [dB]'] = []
-#         sorted_keys = list(freq_vs_label.keys())
-#         sorted_keys.sort()
-#         for key in sorted_keys:
-#             sample['Spectrum_Frequencies [Hz]'].append(key)
-#             sample['Spectrum_LZeq_dt_f [dB]'].append(sample[freq_vs_label[key]])
-#         for key in freq_vs_label.values():
-#             sample.pop(key, None)
-#
-#     return samples
+    return {"timestamps": timestamps, "bands": bands, "levels": levels}
@@ -15,6 +15,6 @@ setup(
       author_email='',
       url='aaa',
       license='LICENSE',
-      packages=find_packages(exclude=["tests"]),
+      packages=find_packages(exclude=["tests", "benchmarks"]),
       package_dir = {'ntixl2': 'ntixl2'}
       )
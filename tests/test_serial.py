@@ -0,0 +1,163 @@
+"""Regression tests of the serial stack against the XL2 emulator.
+
+The tests need a linux host (pseudo-terminals), no XL2 device. Run them with::
+
+    python -m unittest discover tests
+
+"""
+
+import time
+import asyncio
+import unittest
+import numpy as np
+from ntixl2.emulator import XL2Emulator
+from ntixl2.xl2 import XL2SLM, XL2Error
+from ntixl2.aioxl2 import AsyncXL2SLM
+from ntixl2.message import Message, CommandBatch, SLMSnapshot, INITIATE, MEASURE_INITIATE, QUERY_IDN, \
+    QUERY_INITIATE_STATE, QUERY_MEAS_SLM_123, STATISTICS
+
+
+class IDN_WITHOUT_RETURN(Message):
+    # a message whose answer is not expected, the device answers anyway
+    ROOT = "*IDN?"
+    RETURN = None
+
+
+class EmulatorTestCase(unittest.TestCase):
+    latency = 0.
+
+    def setUp(self):
+        self.emu = XL2Emulator(latency=self.latency, seed=0)
+        self.emu.start()
+        self.addCleanup(self.emu.stop)
+
+    def xl2(self, cls=XL2SLM, **kwargs):
+        return cls('/tmp', serialDev=self.emu.serialDev, storageDev=None, **kwargs)
+
+
+class TestSession(EmulatorTestCase):
+
+    def test_connection_is_kept(self):
+        with self.xl2() as xl2:
+            conn = xl2.conn
+            for i in range(20):
+                self.assertEqual(xl2.serial_message(QUERY_INITIATE_STATE()), {'state': 'STOPPED'})
+            self.assertIs(xl2.conn, conn)
+            self.assertTrue(xl2.is_open)
+        self.assertFalse(xl2.is_open)
+        self.assertFalse(conn.is_open)
+
+    def test_without_session(self):
+        xl2 = self.xl2()
+        self.assertEqual(xl2.identification()['unit'], 'XL2')
+        self.assertFalse(xl2.conn.is_open)
+
+    def test_late_answer_is_dropped(self):
+        self.emu.latency = {'*IDN?': 0.3, None: 0.}
+        with self.xl2() as xl2:
+            with self.assertRaises(AssertionError):
+                xl2.serial_message(QUERY_IDN(), wait=0.1)
+            time.sleep(0.4)
+            self.assertEqual(xl2.serial_message(QUERY_INITIATE_STATE()), {'state': 'STOPPED'})
+            self.assertEqual(xl2.stats.snapshot()['*IDN?']['timeouts'], 1)
+
+    def test_async_late_answer_is_dropped(self):
+        self.emu.latency = {'*IDN?': 0.3, None: 0.}
+
+        async def run():
+            async with self.xl2(AsyncXL2SLM) as xl2:
+                with self.assertRaises(AssertionError):
+                    await xl2.serial_message(QUERY_IDN(), wait=0.1)
+                await asyncio.sleep(0.4)
+                return await xl2.serial_message(QUERY_INITIATE_STATE())
+
+        self.assertEqual(asyncio.run(run()), {'state': 'STOPPED'})
+
+
+class TestBatch(EmulatorTestCase):
+
+    def test_batch_answers(self):
+        query = QUERY_MEAS_SLM_123()
+        query.append_param('LAEQ')
+        query.append_param('LCPKMAX')
+        with self.xl2() as xl2:
+            meas, levels, state = xl2.serial_message(CommandBatch([MEASURE_INITIATE(), query,
+                                                                   QUERY_INITIATE_STATE()]))
+        self.assertIsNone(meas)
+        self.assertEqual(len(levels), 2)
+        self.assertEqual(state, {'state': 'STOPPED'})
+        self.assertEqual(xl2.stats.snapshot()['CommandBatch']['count'], 1)
+
+
+class TestAck(EmulatorTestCase):
+
+    def test_echo(self):
+        with self.xl2(ack='echo') as xl2:
+            self.assertIsNone(xl2.serial_message(INITIATE.START()))
+            self.assertEqual(xl2.serial_message(QUERY_INITIATE_STATE()), {'state': 'RUNNING'})
+
+    def test_wait(self):
+        with self.xl2(ack='wait') as xl2:
+            self.assertIsNone(xl2.serial_message(INITIATE.START()))
+            self.assertEqual(xl2.serial_message(QUERY_INITIATE_STATE()), {'state': 'RUNNING'})
+
+    def test_unexpected_answer(self):
+        with self.xl2(ack='echo') as xl2:
+            with self.assertRaises(ValueError):
+                xl2.serial_message(IDN_WITHOUT_RETURN())
+            # the line is still in sync
+            self.assertEqual(xl2.serial_message(QUERY_INITIATE_STATE()), {'state': 'STOPPED'})
+
+
+class TestSnapshot(EmulatorTestCase):
+
+    def test_record(self):
+        t0 = time.time()
+        with self.xl2() as xl2:
+            rec = xl2.snapshot()
+        self.assertEqual(rec.dtype, SLMSnapshot.DTYPE)
+        self.assertGreaterEqual(rec['time'], t0)
+        self.assertEqual(rec['flags'], 0)
+        self.assertTrue(all(20. < rec[p[0]] < 80. for p in STATISTICS))
+
+    def test_out(self):
+        table = np.zeros(3, SLMSnapshot.DTYPE)
+        with self.xl2() as xl2:
+            for i in range(3):
+                xl2.snapshot(out=table, row=i)
+        self.assertTrue((table['time'] > 0).all())
+        self.assertTrue((table['LAEQ'] > 0).all())
+
+    def test_async_concurrent(self):
+        a, b = np.zeros(2, SLMSnapshot.DTYPE), np.zeros(2, SLMSnapshot.DTYPE)
+
+        async def run():
+            async with self.xl2(AsyncXL2SLM) as xl2:
+                return await asyncio.gather(xl2.snapshot(out=a, row=0), xl2.snapshot(out=b, row=1))
+
+        ra, rb = asyncio.run(run())
+        self.assertGreater(a[0]['time'], 0)
+        self.assertGreater(b[1]['time'], 0)
+        self.assertEqual(a[1]['time'], 0)
+        self.assertEqual(b[0]['time'], 0)
+        self.assertEqual(ra['LAEQ'], a[0]['LAEQ'])
+        self.assertEqual(rb['LAEQ'], b[1]['LAEQ'])
+
+
+class TestDevice(unittest.TestCase):
+
+    def test_missing_device(self):
+        with self.assertRaises(XL2Error):
+            XL2SLM('/tmp', serialDev='/dev/does-not-exist', storageDev=None)
+
+    def test_switch_without_storage_device(self):
+        with XL2Emulator() as emu:
+            xl2 = XL2SLM('/tmp', serialDev=emu.serialDev, storageDev=None)
+            with self.assertRaises(XL2Error):
+                xl2.to_mass()
+            with self.assertRaises(XL2Error):
+                xl2.switch_to_serial().result(5)
+
+
+if __name__ == '__main__':
+    unittest.main()